@@ -17,36 +17,68 @@ __all__ = [
 	"relOPTree",
 	"addOPTree",
 	"multOPTree",
+	"SharedLeaves",
+	"AstArena",
+	"Visitor",
+	"preorder",
+	"postorder",
+	"trampoline",
+	"node_numbering",
 ]
 
-from abc import ABC as _ABC
+from array import array as _array
+from contextlib import contextmanager as _contextmanager
+from contextvars import ContextVar as _ContextVar
+from itertools import count as _count
+from types import GeneratorType as _GeneratorType
 
+# Numbers of new nodes: the numbering of the compilation running in the current thread or task, else one numbering
+# shared by all nodes created outside of any.
+_node_numbers = _ContextVar("node_numbers", default=_count(1))
 
-class _AST(_ABC):
+
+@_contextmanager
+def node_numbering(numbers=None):
+	"""Number the nodes created in the current thread or task from a numbering of their own.
+
+	Args:
+		numbers (Iterator[int]): The node numbers. Optional, from 1 by default.
+	"""
+	token = _node_numbers.set(_count(1) if numbers is None else numbers)
+	try:
+		yield
+	finally:
+		_node_numbers.reset(token)
+
+
+# Children of every leaf until a kid is added, shared instead of an empty list per leaf.
+_NO_KIDS = ()
+
+
+class _AST:
 	""" A simple Abstract Syntax Tree structure.
 
-	Contains the root label and children ASTs.
+	Contains the root label and children ASTs. Nodes are slotted, without a __dict__, and leaves share one
+	empty tuple of children.
 
 	Attributes:
-		nodeCount (static int): How many nodes in the program tree.
-		_kids (list): List of immediate children AST.
+		_kids (list | tuple): List of immediate children AST, `_NO_KIDS` for a leaf.
 		_label (str): Label of the root node.
-		_nodeNum (int): The index of the root node in the program tree.
+		_nodeNum (int): The index of the root node in the program tree, from the numbering of the compilation.
 	"""
 
-	nodeCount = 0
+	__slots__ = ("_kids", "_label", "_nodeNum")
 
-	def __init__(self, label):
+	def __init__(self, label, kids=None):
 		"""AST constructor.
 
 		Args:
 			label (str): The root node's label.
+			kids (tuple): `_NO_KIDS` for a leaf. Optional, a node gets a list of children by default.
 		"""
 
-		super().__init__()
-		self._kids = []
-		_AST.nodeCount += 1
-		self._nodeNum = _AST.nodeCount
+		self._kids = [] if kids is None else kids
+		self._nodeNum = next(_node_numbers.get())
 		self._label = label
 
 	def getKid(self, idx):
@@ -87,7 +119,10 @@ class _AST(_ABC):
 		Returns:
 			(AST) The AST of the root node.
 		"""
-		self._kids.append(kidAST)
+		if self._kids is _NO_KIDS:
+			self._kids = [kidAST]
+		else:
+			self._kids.append(kidAST)
 		return self
 
 	def setLabel(self, label):
@@ -111,7 +146,7 @@ class _AST(_ABC):
 
 	def getNodeNum(self):
 		"""
-		Returns: node number
+		Returns: node number, unique per node object. A shared leaf has one number for all of its occurrences.
 		"""
 		return self._nodeNum
 
@@ -133,6 +168,8 @@ class programTree(_AST):
 			program    :-   class *id *block
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('Program/Class')
 
@@ -144,6 +181,8 @@ class blockTree(_AST):
 			block   :-  { [*statements] }
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('Code block')
 
@@ -157,6 +196,8 @@ class declrTree(_AST):
 						*type *id
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('Declaration')
 
@@ -168,6 +209,8 @@ class funcDeclTree(_AST):
 			funcDeclr   :-  *type *id *funcHead *block
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('Function Declaration')
 
@@ -180,6 +223,8 @@ class funcHeadTree(_AST):
 							( [*declr] )     #   params / list of declr
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('Function header')
 
@@ -194,12 +239,15 @@ class typeTree(_AST):
 		Args:
 			isList (bool): whether the type is for a single or a list/array of variables.
 							E.g: String vs String[]
+			typ (str): the type.
 	"""
 
-	def __init__(self, isList=False):
-		super().__init__('Type')
+	__slots__ = ("isArray", "__type")
+
+	def __init__(self, isList=False, typ='-1'):
+		super().__init__('Type', _NO_KIDS)
 		self.isArray = isList
-		self.__type = '-1'
+		self.__type = typ
 
 	def setType(self, typ):
 		self.__type = typ
@@ -218,14 +266,6 @@ class typeTree(_AST):
 		"""
 		self.isArray = True
 
-	def isArray(self):
-		""" Return the value of isList.
-
-		Returns:
-			(bool) whether the type is an array or not.
-		"""
-		return self.isArray
-
 
 class idTree(_AST):
 	""" An AST for a identifier or name.
@@ -238,8 +278,10 @@ class idTree(_AST):
 			name (str): name of the identifier.
 	"""
 
+	__slots__ = ("name", "key")
+
 	def __init__(self, name, key):
-		super().__init__('id')
+		super().__init__('id', _NO_KIDS)
 		self.name = name
 		self.key = key
 
@@ -277,8 +319,10 @@ class numberTree(_AST):
 			value (str): value of the literal number.
 	"""
 
+	__slots__ = ("value",)
+
 	def __init__(self, value):
-		super().__init__('literal number')
+		super().__init__('literal number', _NO_KIDS)
 		self.value = value
 
 	def getValue(self):
@@ -304,8 +348,10 @@ class stringTree(_AST):
 			value (str): value of the literal string.
 	"""
 
+	__slots__ = ("value",)
+
 	def __init__(self, value):
-		super().__init__('literal string')
+		super().__init__('literal string', _NO_KIDS)
 		self.value = value
 
 	def getValue(self):
@@ -330,6 +376,8 @@ class assignTree(_AST):
 			assignToken (str): the assignment operator token name.
 	"""
 
+	__slots__ = ("assignToken",)
+
 	def __init__(self, assignToken):
 		super().__init__('Assignment')
 		self.assignToken = assignToken
@@ -354,6 +402,8 @@ class ifTree(_AST):
 							 if ( *expr ) *block else *block
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('if statement')
 
@@ -365,6 +415,8 @@ class whileTree(_AST):
 			whileStatement  :-  while ( *expr ) *block
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('while statement')
 
@@ -376,6 +428,8 @@ class returnTree(_AST):
 			returnStatement  :-  return expr ;
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('return statement')
 
@@ -387,8 +441,10 @@ class endTree(_AST):
 			semicolon  :-  ;
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
-		super().__init__("semicolon")
+		super().__init__("semicolon", _NO_KIDS)
 
 
 class callTree(_AST):
@@ -399,6 +455,8 @@ class callTree(_AST):
 						  *id ( [*expr] )
 	"""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super().__init__('function call')
 
@@ -413,6 +471,8 @@ class relOPTree(_AST):
 			relToken (str): the relational operator token name.
 	"""
 
+	__slots__ = ("relToken",)
+
 	def __init__(self, relToken):
 		super().__init__('Relational Operation')
 		self.relToken = relToken
@@ -439,6 +499,8 @@ class addOPTree(_AST):
 			addToken (str): the addition operator token name.
 	"""
 
+	__slots__ = ("addToken",)
+
 	def __init__(self, addToken):
 		super().__init__('Additional Operation')
 		self.addToken = addToken
@@ -465,6 +527,8 @@ class multOPTree(_AST):
 			multToken (str): the multiplication operator token name.
 	"""
 
+	__slots__ = ("multToken",)
+
 	def __init__(self, multToken):
 		super().__init__('Multiplication Operation')
 		self.multToken = multToken
@@ -479,3 +543,444 @@ class multOPTree(_AST):
 
 	def getContent(self):
 		return self.getToken()
+
+
+class SharedLeaves:
+	""" Leaf factories that share immutable leaves.
+
+	Every occurrence of a semicolon, of the same single (non-array) type, and of the same literal gets the same
+	node, so a program tree holds one node per distinct leaf. Types that are still to be inferred, such as var,
+	are set by the semantic analysis and never shared. Each parse should use its own SharedLeaves.
+	"""
+
+	__slots__ = ("_leaves",)
+
+	def __init__(self):
+		"""SharedLeaves constructor."""
+		self._leaves = {}
+
+	def _shared(self, leaf_class, *payload):
+		key = (leaf_class, *payload)
+		t = self._leaves.get(key)
+		if t is None:
+			t = self._leaves[key] = leaf_class(*payload)
+		return t
+
+	def endTree(self):
+		return self._shared(endTree)
+
+	def typeTree(self, isList=False, typ='-1'):
+		if isList or typ in ('-1', 'var'):
+			return typeTree(isList, typ)
+		return self._shared(typeTree, isList, typ)
+
+	def numberTree(self, value):
+		return self._shared(numberTree, value)
+
+	def stringTree(self, value):
+		return self._shared(stringTree, value)
+
+
+def preorder(t):
+	"""Iterate over a tree in pre-order, without recursion.
+
+	Args:
+		t (AST): The root of the tree.
+
+	Yields:
+		(AST) Each node, before its children.
+	"""
+	stack = [t]
+	while stack:
+		node = stack.pop()
+		yield node
+		stack.extend(reversed(node.getKids()))
+
+
+def postorder(t):
+	"""Iterate over a tree in post-order, without recursion.
+
+	Args:
+		t (AST): The root of the tree.
+
+	Yields:
+		(AST) Each node, after its children.
+	"""
+	stack = [(t, iter(t.getKids()))]
+	while stack:
+		node, kids = stack[-1]
+		kid = next(kids, None)
+		if kid is None:
+			stack.pop()
+			yield node
+		else:
+			stack.append((kid, iter(kid.getKids())))
+
+
+def trampoline(value):
+	"""Run a generator that yields generators in turn, on an explicit stack instead of the call stack.
+
+	Each generator a generator yields is run to its end, then its return value is sent back to the yielding
+	generator. Other values are sent back as they are. An exception propagates up the yielding generators as it would
+	up nested calls.
+
+	Args:
+		value: A generator, or the value itself.
+
+	Returns:
+		The return value of the generator, or the value.
+	"""
+	if type(value) is not _GeneratorType:
+		return value
+	stack = [value]
+	result, error = None, None
+	while True:
+		try:
+			if error is None:
+				value = stack[-1].send(result)
+			else:
+				value = stack[-1].throw(error)
+		except StopIteration as stop:
+			stack.pop()
+			if not stack:
+				return stop.value
+			result, error = stop.value, None
+			continue
+		except BaseException as e:
+			stack.pop()
+			if not stack:
+				raise
+			result, error = None, e
+			continue
+		if type(value) is _GeneratorType:
+			stack.append(value)
+			result, error = None, None
+		else:
+			result, error = value, None
+
+
+class Visitor:
+	""" A base for passes over an AST, dispatching on the class of each node.
+
+	`visit` calls the method `visit_<class name>` for the class of the node, or for its nearest base class with
+	one, else `generic_visit`. The method for each node class is looked up once per visitor class, then found
+	in a table keyed by the node class.
+
+	A method visits the children of its node with `yield self.dispatch(kid)`, which evaluates to the result of the
+	method of the child. Such methods are run by `trampoline`, so a pass goes as deep as the tree without recursion.
+
+	Example:
+		>>> class Counter(Visitor):
+		>>> 	def visit_idTree(self, t):
+		>>> 		return 1
+		>>>
+		>>> 	def generic_visit(self, t):
+		>>> 		count = 0
+		>>> 		for kid in t.getKids():
+		>>> 			count += yield self.dispatch(kid)
+		>>> 		return count
+	"""
+
+	_visit_methods = {}
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		cls._visit_methods = {}
+
+	def visit(self, t, *args):
+		"""Visit a node with the method for its class.
+
+		Args:
+			t (AST): The node.
+			*args: The other arguments of the method.
+
+		Returns:
+			The result of the method.
+		"""
+		return trampoline(self.dispatch(t, *args))
+
+	def dispatch(self, t, *args):
+		"""Call the method for the class of a node, without running the visits of its children.
+
+		Args:
+			t (AST): The node.
+			*args: The other arguments of the method.
+
+		Returns:
+			The result of the method, or a generator for `trampoline` when the method visits children.
+		"""
+		try:
+			method = self._visit_methods[type(t)]
+		except KeyError:
+			method = self._visit_methods[type(t)] = self._visit_method(type(t))
+		return method(self, t, *args)
+
+	@classmethod
+	def _visit_method(cls, node_class):
+		for base in node_class.__mro__:
+			method = getattr(cls, f"visit_{base.__name__}", None)
+			if method is not None:
+				return method
+		return cls.generic_visit
+
+	def generic_visit(self, t, *args):
+		"""Visit the children of a node that has no method of its own.
+
+		Args:
+			t (AST): The node.
+			*args: The other arguments of the method.
+		"""
+		for kid in t.getKids():
+			yield self.dispatch(kid)
+
+
+# Node classes indexed by the ints stored in `AstArena.kinds`.
+_NODE_CLASSES = (programTree, blockTree, declrTree, funcDeclTree, funcHeadTree, typeTree, idTree, numberTree,
+				 stringTree, assignTree, ifTree, whileTree, returnTree, endTree, callTree, relOPTree, addOPTree,
+				 multOPTree)
+_NODE_KINDS = {cls: kind for kind, cls in enumerate(_NODE_CLASSES)}
+
+# Number of payload values of each node class: its constructor arguments.
+_PAYLOAD_SIZES = {typeTree: 2, idTree: 2, numberTree: 1, stringTree: 1, assignTree: 1, relOPTree: 1, addOPTree: 1,
+				  multOPTree: 1}
+
+
+class AstArena:
+	""" A flat AST, for very large programs.
+
+	Nodes are indexes into parallel `array` columns instead of objects. The children of a node are linked
+	through the first kid and next sibling columns, and the payload of a node (a name, key, value, type or
+	operator) is a slice of one shared list. Node 0 is the root.
+
+	The Parser emits into an arena through `trees`. `kids` and `walk` iterate over node indexes without
+	creating objects, and `materialize` creates the `_AST` objects of a subtree when they are needed, for
+	example to render the graph.
+
+	Attributes:
+		kinds (array): The node class of every node, an index into the node classes.
+		first_kids (array): The index of the first kid of every node, -1 for none.
+		next_siblings (array): The index of the next sibling of every node, -1 for none.
+		payloads (array): The index of the first payload value of every node in `values`, -1 for none.
+		values (list): The payload values of all nodes.
+	"""
+
+	def __init__(self):
+		"""AstArena constructor."""
+		self.kinds = _array("B")
+		self.first_kids = _array("q")
+		self.next_siblings = _array("q")
+		self.payloads = _array("q")
+		self.values = []
+		self.__last_kids = _array("q")
+
+	def __len__(self):
+		return len(self.kinds)
+
+	@property
+	def trees(self):
+		"""Node factories named after the node classes, which add the nodes to this arena.
+
+		They return handles with the `addKid`, `setType`, `getType` and `setArray` methods of the nodes, so
+		code building `_AST` objects builds the same tree in the arena.
+		"""
+		return _ArenaTrees(self)
+
+	@classmethod
+	def from_tree(cls, tree):
+		"""Creates the arena of an AST.
+
+		Args:
+			tree (AST): The root of the AST.
+
+		Returns:
+			(AstArena) The arena, with the root at index 0.
+		"""
+		arena = cls()
+		stack = [(tree, -1)]
+		while stack:
+			t, parent = stack.pop()
+			index = arena.add(type(t), *cls._payload_of(t))
+			if parent >= 0:
+				arena.add_kid(parent, index)
+			stack.extend((kid, index) for kid in reversed(t.getKids()))
+		return arena
+
+	@staticmethod
+	def _payload_of(t):
+		if isinstance(t, typeTree):
+			return t.isArray, t.getType()
+		if isinstance(t, idTree):
+			return t.getName(), t.getKey()
+		if isinstance(t, (numberTree, stringTree)):
+			return t.getValue(),
+		if type(t) in _PAYLOAD_SIZES:
+			return t.getToken(),
+		return ()
+
+	def add(self, node_class, *payload):
+		"""Adds a node without a parent.
+
+		Args:
+			node_class (type): The class of the node.
+			*payload: The constructor arguments of the node.
+
+		Returns:
+			(int) The index of the node.
+		"""
+		index = len(self.kinds)
+		self.kinds.append(_NODE_KINDS[node_class])
+		self.first_kids.append(-1)
+		self.next_siblings.append(-1)
+		self.__last_kids.append(-1)
+		if node_class in _PAYLOAD_SIZES:
+			if node_class is typeTree:
+				payload += (False, '-1')[len(payload):]
+			self.payloads.append(len(self.values))
+			self.values.extend(payload)
+		else:
+			self.payloads.append(-1)
+		return index
+
+	def add_kid(self, index, kid):
+		"""Appends a node to the children of another.
+
+		Args:
+			index (int): The index of the parent node.
+			kid (int): The index of the node to be added.
+		"""
+		last = self.__last_kids[index]
+		if last < 0:
+			self.first_kids[index] = kid
+		else:
+			self.next_siblings[last] = kid
+		self.__last_kids[index] = kid
+
+	def setType(self, index, typ):
+		""" Set the type of a typeTree node."""
+		self.values[self.payloads[index] + 1] = typ
+
+	def setArray(self, index):
+		""" Set the value of isList of a typeTree node to True."""
+		self.values[self.payloads[index]] = True
+
+	def node_class(self, index):
+		"""Return the class of a node.
+
+		Args:
+			index (int): The index of the node.
+
+		Returns:
+			(type) The class of the node.
+		"""
+		return _NODE_CLASSES[self.kinds[index]]
+
+	def payload(self, index):
+		"""Return the payload values of a node.
+
+		Args:
+			index (int): The index of the node.
+
+		Returns:
+			(tuple) The constructor arguments of the node.
+		"""
+		start = self.payloads[index]
+		if start < 0:
+			return ()
+		return tuple(self.values[start:start + _PAYLOAD_SIZES[self.node_class(index)]])
+
+	def kids(self, index=0):
+		"""Iterate over the children of a node.
+
+		Args:
+			index (int): The index of the node, the root by default.
+
+		Yields:
+			(int) The index of each child, in order.
+		"""
+		kid = self.first_kids[index]
+		while kid >= 0:
+			yield kid
+			kid = self.next_siblings[kid]
+
+	def walk(self, index=0):
+		"""Iterate over a subtree in pre-order, without recursion.
+
+		Args:
+			index (int): The index of the root of the subtree, the root by default.
+
+		Yields:
+			(int) The index of each node of the subtree.
+		"""
+		first_kids, next_siblings = self.first_kids, self.next_siblings
+		stack = [index]
+		while stack:
+			node = stack.pop()
+			yield node
+			sibling = next_siblings[node]
+			if sibling >= 0 and node != index:
+				stack.append(sibling)
+			kid = first_kids[node]
+			if kid >= 0:
+				stack.append(kid)
+
+	def materialize(self, index=0):
+		"""Create the `_AST` objects of a subtree.
+
+		Args:
+			index (int): The index of the root of the subtree, the root by default.
+
+		Returns:
+			(AST) The root of the subtree.
+		"""
+		nodes = {}
+		for node in self.walk(index):
+			nodes[node] = self.node_class(node)(*self.payload(node))
+		for node, t in nodes.items():
+			for kid in self.kids(node):
+				t.addKid(nodes[kid])
+		return nodes[index]
+
+
+class _ArenaNode:
+	""" A handle on a node of an AstArena, with the methods the Parser calls on the nodes it builds."""
+
+	__slots__ = ("arena", "index")
+
+	def __init__(self, arena, index):
+		self.arena = arena
+		self.index = index
+
+	def addKid(self, kidAST):
+		self.arena.add_kid(self.index, kidAST.index)
+		return self
+
+	def setType(self, typ):
+		self.arena.setType(self.index, typ)
+
+	def getType(self):
+		return self.arena.payload(self.index)[1]
+
+	def setArray(self):
+		self.arena.setArray(self.index)
+
+
+class _ArenaTrees:
+	""" Node factories of an AstArena, named after the node classes."""
+
+	__slots__ = ("_arena",)
+
+	def __init__(self, arena):
+		self._arena = arena
+
+
+def _arena_factory(node_class):
+	def create(self, *payload):
+		return _ArenaNode(self._arena, self._arena.add(node_class, *payload))
+
+	create.__name__ = node_class.__name__
+	return create
+
+
+for _node_class in _NODE_CLASSES:
+	setattr(_ArenaTrees, _node_class.__name__, _arena_factory(_node_class))
+del _node_class
@@ -0,0 +1,160 @@
+"""This is the module to run the frontend over many source files at once.
+
+Each file is lexed, parsed, put in a symbol table and analyzed in a worker process of its own, so independent
+files are checked in parallel on every core.
+
+Example:
+    >>> from batch import analyze_files
+    >>>
+    >>> for result in analyze_files(["case1/Main.java", "organized_tests"]):
+    >>>     print(result.path, result.diagnostics)
+"""
+
+__all__ = [
+    "FileResult",
+    "source_files",
+    "analyze_file",
+    "analyze_files",
+]
+
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from os import cpu_count as _cpu_count
+from pathlib import Path as _Path
+from typing import Iterable as _Iterable
+from typing import List as _List
+from typing import Mapping as _Mapping
+from typing import NamedTuple as _NamedTuple
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+
+try:
+    from lex import Lexer as _Lexer
+    from lex import TokenStream as _TokenStream
+    from parse import Parser as _Parser
+    from semantic import Semantic as _Semantic
+    from symbol_table import SymbolTable as _SymbolTable
+except ImportError:
+    from src.lex import Lexer as _Lexer
+    from src.lex import TokenStream as _TokenStream
+    from src.parse import Parser as _Parser
+    from src.semantic import Semantic as _Semantic
+    from src.symbol_table import SymbolTable as _SymbolTable
+
+
+class FileResult(_NamedTuple):
+    """The frontend result of one source file.
+
+    It only holds plain data, so it can be sent back from a worker process.
+
+    Attributes:
+        path (str): The path of the source file.
+        analyzed_tree (programTree): The analyzed program tree, None if the file has errors or the result comes
+            from `analyze_files`.
+        symbol_table (SymbolEntries): The data of the symbol table, None if it could not be generated.
+        diagnostics (Tuple[str, ...]): The error messages, empty if the file has no errors.
+    """
+
+    path: str
+    analyzed_tree: object
+    symbol_table: _Optional[_Mapping]
+    diagnostics: _Tuple[str, ...]
+
+    @property
+    def ok(self) -> bool:
+        """bool: True if the file has no errors."""
+        return not self.diagnostics
+
+
+def source_files(paths: _Iterable) -> _List[str]:
+    """Expands the given paths into source files.
+
+    Args:
+        paths (Iterable[str | Path]): Source files, or directories to search for ``.java`` files.
+
+    Returns:
+        List[str]: The source files, the ones found in a directory in sorted order.
+    """
+    files = []
+    for path in map(_Path, paths):
+        if path.is_dir():
+            files.extend(str(file) for file in sorted(path.rglob("*.java")))
+        else:
+            files.append(str(path))
+    return files
+
+
+def analyze_file(path) -> FileResult:
+    """Runs the lexer, parser, symbol table and semantic analysis over one source file.
+
+    Errors are collected instead of ending the process: every syntax error of the parser, or the errors of the
+    semantic analysis, each as a diagnostic of its own.
+
+    Args:
+        path (str | Path): The path of the source file.
+
+    Returns:
+        FileResult: The result of the file.
+    """
+    analyzed_tree = None
+    symbol_table = None
+    diagnostics = []
+    try:
+        with open(path, "r") as f:
+            buffer = f.read()
+        token_stream = _TokenStream(_Lexer(buffer))
+        stb = _SymbolTable(line_index=token_stream.line_index)
+        program_tree, errors = _Parser(token_stream, symbolTable=stb).parse()
+        if errors:
+            diagnostics.extend(f"Error. {error}" for error in errors)
+            return FileResult(str(path), None, None, tuple(diagnostics))
+        symbol_table = stb.data
+        tree, errors = _Semantic(program_tree, stb).check()
+        if errors:
+            diagnostics.extend(f"Error. {error}" for error in errors)
+        else:
+            analyzed_tree = tree
+    except Exception as e:
+        diagnostics.append(f"Error. {e}")
+    return FileResult(str(path), analyzed_tree, symbol_table, tuple(diagnostics))
+
+
+def _check_file(path) -> FileResult:
+    """Runs `analyze_file` over one source file, keeping only what is sent back from a worker process.
+
+    The analyzed tree is left out: pickling a deeply nested tree exceeds the recursion limit.
+
+    Args:
+        path (str): The path of the source file.
+
+    Returns:
+        FileResult: The result of the file, without its analyzed tree.
+    """
+    return analyze_file(path)._replace(analyzed_tree=None)
+
+
+def analyze_files(paths: _Iterable, max_workers: int = None) -> _List[FileResult]:
+    """Runs `analyze_file` over many source files in a process pool.
+
+    The results do not hold the analyzed trees, whatever the number of workers. A file whose worker fails gets
+    the failure as its diagnostic, and the other files keep their results.
+
+    Args:
+        paths (Iterable[str | Path]): Source files, or directories to search for ``.java`` files.
+        max_workers (int): The number of worker processes, the number of processors by default.
+
+    Returns:
+        List[FileResult]: The results, in the order of `source_files`.
+    """
+    files = source_files(paths)
+    workers = min(max_workers or _cpu_count() or 1, len(files))
+    if workers <= 1:
+        return [_check_file(file) for file in files]
+    results = []
+    with _ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_check_file, file) for file in files]
+        for file, future in zip(files, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(FileResult(file, None, None, (f"Error. {e}",)))
+    return results
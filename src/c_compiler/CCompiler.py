@@ -1,6 +1,8 @@
 from distutils.ccompiler import new_compiler
 from glob import glob
 from os import remove, path
+from shutil import rmtree
+from tempfile import mkdtemp
 import subprocess
 import json
 
@@ -10,12 +12,17 @@ class CCompiler:
         self.src_file = src_file
         self.exe_file = exe_file
         if not self.exe_file:
-            self.exe_file = self.src_file.split('.')[0]
+            self.exe_file = path.splitext(self.src_file)[0]
         self.compiler = new_compiler()
+        # Object files of this compiler only, in a directory of their own
+        self.obj_dir = None
+        self.obj_files = []
 
     def clean(self, include_exe=False):
-        for f in glob('*.o*'):
-            remove(f)
+        if self.obj_dir:
+            rmtree(self.obj_dir, ignore_errors=True)
+            self.obj_dir = None
+            self.obj_files = []
         if (include_exe):
             for f in glob(f'{self.exe_file}.exe'):
                 remove(f)
@@ -25,27 +32,34 @@ class CCompiler:
     def exe(self, clean=True):
         self.obj()
         # libraries=['m'] <=> -lm : link with math library
-        self.compiler.link_executable(glob('*.o*'), libraries=['m'], output_progname=self.exe_file)
+        self.compiler.link_executable(self.obj_files, libraries=['m'], output_progname=self.exe_file)
         if clean:
             self.clean()
 
     def obj(self):
-        self.compiler.compile([self.src_file])
+        if not self.obj_dir:
+            self.obj_dir = mkdtemp(prefix='jcosim-')
+        self.obj_files += self.compiler.compile([self.src_file], output_dir=self.obj_dir)
 
 
 class CustomGCC:
-    def __init__(self, src_file, exe_file=None):
+    def __init__(self, src_file, exe_file=None, config_file='jcosim.config.json'):
         self.src_file = src_file
         self.exe_file = exe_file
         if not self.exe_file:
-            self.exe_file = self.src_file.split('.')[0]
-        with open('jcosim.config.json', 'r') as f:
+            self.exe_file = path.splitext(self.src_file)[0]
+        with open(config_file, 'r') as f:
             config = json.load(f)
             self.cc = config['cc']
+        # Object files of this compiler only, in a directory of their own
+        self.obj_dir = None
+        self.obj_files = []
 
     def clean(self, include_exe=False):
-        for f in glob('*.o*'):
-            remove(f)
+        if self.obj_dir:
+            rmtree(self.obj_dir, ignore_errors=True)
+            self.obj_dir = None
+            self.obj_files = []
         if (include_exe):
             for f in glob(f'{self.exe_file}.exe'):
                 remove(f)
@@ -59,4 +73,8 @@ class CustomGCC:
             self.clean()
 
     def obj(self):
-        subprocess.run([self.cc, f'-c{self.src_file}'])
+        if not self.obj_dir:
+            self.obj_dir = mkdtemp(prefix='jcosim-')
+        obj_file = path.join(self.obj_dir, path.splitext(path.basename(self.src_file))[0] + '.o')
+        subprocess.run([self.cc, f'-c{self.src_file}', f'-o{obj_file}'])
+        self.obj_files.append(obj_file)
@@ -0,0 +1,162 @@
+"""This is the module to cache the frontend results of source files on disk.
+
+Entries are keyed by a hash of the source and the compiler version, so an unchanged file compiled again skips the
+lexer, parser, symbol table and semantic analysis. The cache directory is bounded in size: the least recently used
+entries are evicted first.
+
+Example:
+    >>> from cache import Cache, CacheEntry
+    >>>
+    >>> cache = Cache()
+    >>> key = Cache.key(character_stream)
+    >>> entry = cache.load(key)
+    >>> if entry is None:
+    >>>     cache.store(key, CacheEntry(token_stream.columns(), program_tree, stb.data, analyzed_tree))
+"""
+
+__all__ = [
+    "COMPILER_VERSION",
+    "CacheEntry",
+    "Cache",
+]
+
+import os as _os
+import pickle as _pickle
+from hashlib import sha256 as _sha256
+from pathlib import Path as _Path
+from tempfile import NamedTemporaryFile as _NamedTemporaryFile
+from typing import NamedTuple as _NamedTuple
+from typing import Optional as _Optional
+from typing import Tuple as _Tuple
+
+# Part of every key. Bump it when a phase changes its output or the layout of the cached objects.
+COMPILER_VERSION = "3"
+
+
+class CacheEntry(_NamedTuple):
+    """The cached frontend results of one source file.
+
+    Attributes:
+        token_columns (Tuple[array, array, array]): The columns of the token stream, from `TokenStream.columns`.
+        program_tree (programTree): The program tree.
+        symbol_table (SymbolEntries): The data of the symbol table.
+        analyzed_tree (programTree): The analyzed program tree.
+    """
+
+    token_columns: _Tuple
+    program_tree: object
+    symbol_table: object
+    analyzed_tree: object
+
+
+class Cache:
+    """A content-addressed cache of frontend results in a directory.
+
+    Attributes:
+        directory (Path): The cache directory.
+        max_size (int): The maximum total size of the entries, in bytes.
+    """
+
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, directory=None, max_size: int = DEFAULT_MAX_SIZE):
+        """Cache constructor.
+
+        Args:
+            directory (str | Path): The cache directory. Defaults to `JCOSIM_CACHE_DIR`, or the jcosim directory
+                in the user cache directory.
+            max_size (int): The maximum total size of the entries, in bytes.
+        """
+        if directory is None:
+            directory = _os.environ.get("JCOSIM_CACHE_DIR") or _Path(
+                _os.environ.get("XDG_CACHE_HOME") or _Path.home().joinpath(".cache")).joinpath("jcosim")
+        self.directory = _Path(directory)
+        self.max_size = max_size
+
+    @staticmethod
+    def key(character_stream) -> str:
+        """Returns the key of a source.
+
+        Token positions count characters in a str and bytes in a byte buffer, so the kind of stream is hashed too.
+
+        Args:
+            character_stream (str | bytes-like): The character stream of the source, or a byte buffer over it.
+
+        Returns:
+            str: The hex digest of the compiler version and the source.
+        """
+        digest = _sha256(f"jcosim {COMPILER_VERSION}\0".encode())
+        if isinstance(character_stream, str):
+            digest.update(b"str\0")
+            digest.update(character_stream.encode("utf-8", "surrogatepass"))
+        else:
+            digest.update(b"bytes\0")
+            digest.update(character_stream)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> _Path:
+        return self.directory.joinpath(f"{key}.pickle")
+
+    def load(self, key: str) -> _Optional[CacheEntry]:
+        """Returns the entry with the given key, and marks it as the most recently used.
+
+        Args:
+            key (str): The key of the source.
+
+        Returns:
+            CacheEntry: The entry, None if there is no entry or it cannot be read.
+        """
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                entry = _pickle.load(f)
+            _os.utime(path)
+        except Exception:
+            # Missing, truncated or written by an incompatible compiler: a miss either way.
+            return None
+        return entry if isinstance(entry, CacheEntry) else None
+
+    def store(self, key: str, entry: CacheEntry) -> bool:
+        """Stores an entry, then evicts the least recently used entries over the size bound.
+
+        The entry is written to a temporary file first, so concurrent compilations never read a partial entry.
+
+        Args:
+            key (str): The key of the source.
+            entry (CacheEntry): The entry.
+
+        Returns:
+            bool: True if the entry was stored.
+        """
+        try:
+            data = _pickle.dumps(entry, protocol=_pickle.HIGHEST_PROTOCOL)
+        except (_pickle.PicklingError, RecursionError):
+            return False
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with _NamedTemporaryFile("wb", dir=self.directory, suffix=".tmp", delete=False) as f:
+                f.write(data)
+            _os.replace(f.name, self._path(key))
+            self._evict()
+        except OSError:
+            return False
+        return True
+
+    def _evict(self):
+        """Removes the least recently used entries until the total size is within `max_size`."""
+        entries = []
+        for path in self.directory.glob("*.pickle"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries, key=lambda entry: entry[0]):
+            if size <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= entry_size
@@ -1,15 +1,15 @@
 __all__ = ["CodeGen"]
 
 try:
-    from ast import addOPTree, assignTree, blockTree, callTree, declrTree, endTree, funcDeclTree, funcHeadTree, idTree, \
-        ifTree, multOPTree, numberTree, programTree, relOPTree, returnTree, stringTree, typeTree, whileTree
+    from ast import Visitor as _Visitor
+    from ast import idTree, typeTree
     from mapper import code_mapper as _code_mapper
-    from mapper import get_value_by_name as _get_value_by_name
+    from mapper import NAME_TO_VALUE as _NAME_TO_VALUE
 except ImportError:
-    from src.ast import addOPTree, assignTree, blockTree, callTree, declrTree, endTree, funcDeclTree, funcHeadTree, \
-        idTree, ifTree, multOPTree, numberTree, programTree, relOPTree, returnTree, stringTree, typeTree, whileTree
+    from src.ast import Visitor as _Visitor
+    from src.ast import idTree, typeTree
     from src.mapper import code_mapper as _code_mapper
-    from src.mapper import get_value_by_name as _get_value_by_name
+    from src.mapper import NAME_TO_VALUE as _NAME_TO_VALUE
 
 MAPPER = {
     "Math.PI": "M_PI",
@@ -33,163 +33,171 @@ TYPE_MAPPER = {
 IGNORE = ["Scanner", "scanner.close"]
 
 
-class CodeGen:
+# Generates the C code of the analyzed program tree, with one visit method per node class.
+# The methods yield the children they generate, so nesting depth is not bounded by the recursion limit.
+class CodeGen(_Visitor):
     def __init__(self, ast, symtable):
         self.ast = ast
         self.symtable = symtable
 
-    def travel_tree(self, t, __main=False):
-        if isinstance(t, programTree):
-            code = ""
-            for tree in t.getKids():
-                code += self.travel_tree(tree)
-            return code
-
-        elif isinstance(t, funcDeclTree):
-            if self.travel_tree(t.getKid(1)) + self.travel_tree(t.getKid(2)) == "void main":
-                return f"int main(void) {self.travel_tree(t.getKid(4), True)}"
-            code = ""
-            for tree in t.getKids():
-                code += self.travel_tree(tree)
-            return code
-        elif isinstance(t, assignTree):
-            code = self.travel_tree(t.getKid(1))
-            code += f" {t.getToken()} "
-            code += self.travel_tree(t.getKid(2))
-            return code
-
-        elif isinstance(t, declrTree):
-            datatype = self.travel_tree(t.getKid(1))
-            name = self.travel_tree(t.getKid(2))
-            if t.getKid(1).isArray:
-                name += "[]"
-            code = datatype + name
-            try:
-                expr = self.travel_tree(t.getKid(3))
-                if len(expr) == 2:
-                    if expr[0] in _code_mapper.INPUT_FUNC.values():
-                        code = expr[1] + " " + name + ";\n" + expr[0] + name + ")" + self.travel_tree(t.getKid(4))
-                        return code
-                    if datatype == "var ":
-                        print("\n\n\n\n\n\n\n{True,|n\n")
-                else:
-                    if expr == "":
-                        return "\n"
-                    if expr == ";\n":
-                        return code + expr
-                    code += f" = {expr}"
-            except TypeError:
-                pass
-            try:
-                code += self.travel_tree(t.getKid(4))
-            except TypeError:
-                pass
-            return code
-        elif isinstance(t, callTree):
-            code = ""
-            for idx, kid in enumerate(t.getKids()):
-                if idx == 0:
-                    name = self.travel_tree(t.getKid(1))
-                    typ = self.symtable.get_declaration_data(t.getKid(1).getKey())[1]
-                    if name in _code_mapper.MAPPER:
-                        name = _code_mapper.MAPPER[name]
-                    elif name in _code_mapper.INPUT_FUNC:
-                        return _code_mapper.INPUT_FUNC[name], typ
-                    elif name in _code_mapper.IGNORE:
-                        return ""
-                    code += name + "("
-                else:
-                    if self.travel_tree(t.getKid(idx + 1)) == ";\n":
-                        return (code + ");\n"), typ
-                    code += self.travel_tree(t.getKid(idx + 1))
-                    if idx != t.kidCount() - 1 and self.travel_tree(t.getKid(idx + 2)) != ";\n":
-                        code += ", "
-            code += ")"
-            return code
-
-        elif isinstance(t, (addOPTree, multOPTree, relOPTree)):
-            code = " ".join(
-                ["(", self.travel_tree(t.getKid(1)), _get_value_by_name(t.getToken()), self.travel_tree(t.getKid(2)), ")"])
-            return code
-
-        elif isinstance(t, typeTree):
-            if t.getType() in _code_mapper.TYPE_MAPPER:
-                code = _code_mapper.TYPE_MAPPER[t.getType()]
+    travel_tree = _Visitor.visit
+
+    def visit_programTree(self, t):
+        code = ""
+        for tree in t.getKids():
+            code += yield self.dispatch(tree)
+        return code
+
+    def visit_funcDeclTree(self, t):
+        if (yield self.dispatch(t.getKid(1))) + (yield self.dispatch(t.getKid(2))) == "void main":
+            block = yield self.dispatch(t.getKid(4), True)
+            return f"int main(void) {block}"
+        code = ""
+        for tree in t.getKids():
+            code += yield self.dispatch(tree)
+        return code
+
+    def visit_assignTree(self, t):
+        code = yield self.dispatch(t.getKid(1))
+        code += f" {t.getToken()} "
+        code += yield self.dispatch(t.getKid(2))
+        return code
+
+    def visit_declrTree(self, t):
+        datatype = yield self.dispatch(t.getKid(1))
+        name = yield self.dispatch(t.getKid(2))
+        if t.getKid(1).isArray:
+            name += "[]"
+        code = datatype + name
+        try:
+            expr = yield self.dispatch(t.getKid(3))
+            if len(expr) == 2:
+                if expr[0] in _code_mapper.INPUT_FUNC.values():
+                    code = expr[1] + " " + name + ";\n" + expr[0] + name + ")" + (yield self.dispatch(t.getKid(4)))
+                    return code
+                if datatype == "var ":
+                    print("\n\n\n\n\n\n\n{True,|n\n")
             else:
-                code = t.getType()
-            return code + " "
-
-        elif isinstance(t, idTree):
-            name = t.getName()
-            code = ""
-            if name in _code_mapper.Double_Java:
-                name = _code_mapper.Double_Java[name]
-            code += name
-            return code
-
-        elif isinstance(t, numberTree):
-            code = t.getValue()
-            return code
-
-        elif isinstance(t, stringTree):
-            code = t.getValue()
-            return code
-
-        elif isinstance(t, blockTree):
-            code = "\n{\n"
-            for tree in t.getKids():
-                expr = self.travel_tree(tree)
-                if len(expr) == 2:
-                    code += expr[0]
-                else:
-                    code += expr
-            if __main:
-                code += "return 0;\n"
-            code += "}\n"
-            return code
-
-        elif isinstance(t, funcHeadTree):
-            code = "("
-            for idx, tree in enumerate(t.getKids()):
-                code += self.travel_tree(tree)
-                if isinstance(t.getKid(idx - 1), typeTree) and isinstance(t.getKid(idx), idTree):
-                    if t.getKid(1).isArray:
-                        code += "[]"
-                if idx != len(t.getKids()) - 1:
+                if expr == "":
+                    return "\n"
+                if expr == ";\n":
+                    return code + expr
+                code += f" = {expr}"
+        except TypeError:
+            pass
+        try:
+            code += yield self.dispatch(t.getKid(4))
+        except TypeError:
+            pass
+        return code
+
+    def visit_callTree(self, t):
+        code = ""
+        for idx, kid in enumerate(t.getKids()):
+            if idx == 0:
+                name = yield self.dispatch(t.getKid(1))
+                typ = self.symtable.get_declaration_data(t.getKid(1).getKey())[1]
+                if name in _code_mapper.MAPPER:
+                    name = _code_mapper.MAPPER[name]
+                elif name in _code_mapper.INPUT_FUNC:
+                    return _code_mapper.INPUT_FUNC[name], typ
+                elif name in _code_mapper.IGNORE:
+                    return ""
+                code += name + "("
+            else:
+                if (yield self.dispatch(t.getKid(idx + 1))) == ";\n":
+                    return (code + ");\n"), typ
+                code += yield self.dispatch(t.getKid(idx + 1))
+                if idx != t.kidCount() - 1 and (yield self.dispatch(t.getKid(idx + 2))) != ";\n":
                     code += ", "
-            code += ")"
-            return code
-
-        elif isinstance(t, ifTree):
-            block_cond = self.travel_tree(t.getKids()[0])
-            block_if = self.travel_tree(t.getKids()[1])
-            code = "if " + block_cond + "\n"
-            code += block_if + "\n"
-            if len(t.getKids()) == 3:
-                block_else = self.travel_tree(t.getKids()[2])
-                code += "else " + block_else + "\n"
-            return code
-
-        elif isinstance(t, whileTree):
-            block_cond = self.travel_tree(t.getKids()[0])
-            block_while = self.travel_tree(t.getKids()[1])
-            code = "while " + block_cond + "{\n"
-            code += block_while + "}\n"
-            return code
-
-        elif isinstance(t, returnTree):
-            code = "return "
-            for tree in t.getKids():
-                code += self.travel_tree(tree)
-            return code
-
-        elif isinstance(t, endTree):
-            return ";\n"
+        code += ")"
+        return code
+
+    def visit_addOPTree(self, t):
+        code = " ".join(["(", (yield self.dispatch(t.getKid(1))), _NAME_TO_VALUE[t.getToken()],
+                         (yield self.dispatch(t.getKid(2))), ")"])
+        return code
 
+    visit_multOPTree = visit_relOPTree = visit_addOPTree
+
+    def visit_typeTree(self, t):
+        if t.getType() in _code_mapper.TYPE_MAPPER:
+            code = _code_mapper.TYPE_MAPPER[t.getType()]
         else:
-            if t is None:
-                raise TypeError(type(t))
-            raise SyntaxError(f"UwU What's dis error? {type(t)}")
+            code = t.getType()
+        return code + " "
+
+    def visit_idTree(self, t):
+        name = t.getName()
+        code = ""
+        if name in _code_mapper.Double_Java:
+            name = _code_mapper.Double_Java[name]
+        code += name
+        return code
+
+    def visit_numberTree(self, t):
+        code = t.getValue()
+        return code
+
+    def visit_stringTree(self, t):
+        code = t.getValue()
+        return code
+
+    def visit_blockTree(self, t, isMain=False):
+        code = "\n{\n"
+        for tree in t.getKids():
+            expr = yield self.dispatch(tree)
+            if len(expr) == 2:
+                code += expr[0]
+            else:
+                code += expr
+        if isMain:
+            code += "return 0;\n"
+        code += "}\n"
+        return code
+
+    def visit_funcHeadTree(self, t):
+        code = "("
+        for idx, tree in enumerate(t.getKids()):
+            code += yield self.dispatch(tree)
+            if isinstance(t.getKid(idx - 1), typeTree) and isinstance(t.getKid(idx), idTree):
+                if t.getKid(1).isArray:
+                    code += "[]"
+            if idx != len(t.getKids()) - 1:
+                code += ", "
+        code += ")"
+        return code
+
+    def visit_ifTree(self, t):
+        block_cond = yield self.dispatch(t.getKids()[0])
+        block_if = yield self.dispatch(t.getKids()[1])
+        code = "if " + block_cond + "\n"
+        code += block_if + "\n"
+        if len(t.getKids()) == 3:
+            block_else = yield self.dispatch(t.getKids()[2])
+            code += "else " + block_else + "\n"
+        return code
+
+    def visit_whileTree(self, t):
+        block_cond = yield self.dispatch(t.getKids()[0])
+        block_while = yield self.dispatch(t.getKids()[1])
+        code = "while " + block_cond + "{\n"
+        code += block_while + "}\n"
+        return code
+
+    def visit_returnTree(self, t):
+        code = "return "
+        for tree in t.getKids():
+            code += yield self.dispatch(tree)
+        return code
+
+    def visit_endTree(self, t):
+        return ";\n"
+
+    def generic_visit(self, t):
+        if t is None:
+            raise TypeError(type(t))
+        raise SyntaxError(f"UwU What's dis error? {type(t)}")
 
     def generate_code(self):
         header = """#include <stdio.h> \n#include <stdlib.h> \n#include <math.h>\n"""
@@ -0,0 +1,238 @@
+"""This is the module holding the state of one compilation.
+
+A Compilation owns everything one run of the compiler counts or writes: the numbers of its tree nodes, the paths
+of its outputs in its output directory, and the native compiler it calls. Compilations share no state, so many
+of them can run in one process, from a thread pool or in the same directory.
+
+Example:
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> from compilation import Compilation
+    >>>
+    >>> def compile_file(source):
+    >>>     with Compilation(source, output_dir=f"build/{source.parent.name}") as compilation:
+    >>>         return compilation.compile()
+    >>>
+    >>> with ThreadPoolExecutor() as executor:
+    >>>     codes = list(executor.map(compile_file, sources))
+"""
+
+__all__ = ["Compilation", "CompileError"]
+
+import os as _os
+from itertools import count as _count
+from mmap import ACCESS_READ as _ACCESS_READ
+from mmap import mmap as _mmap
+from pathlib import Path as _Path
+from shutil import which as _which
+from typing import Tuple as _Tuple
+
+try:
+    from ast import node_numbering as _node_numbering
+    from cache import Cache as _Cache
+    from cache import CacheEntry as _CacheEntry
+    from c_compiler import CCompiler as _CCompiler
+    from c_compiler import CustomGCC as _CustomGCC
+    from codegen import CodeGen as _CodeGen
+    from lex import Lexer as _Lexer
+    from lex import TokenStream as _TokenStream
+    from parse import Parser as _Parser
+    from semantic import Semantic as _Semantic
+    from symbol_table import SymbolTable as _SymbolTable
+except ImportError:
+    from src.ast import node_numbering as _node_numbering
+    from src.cache import Cache as _Cache
+    from src.cache import CacheEntry as _CacheEntry
+    from src.c_compiler import CCompiler as _CCompiler
+    from src.c_compiler import CustomGCC as _CustomGCC
+    from src.codegen import CodeGen as _CodeGen
+    from src.lex import Lexer as _Lexer
+    from src.lex import TokenStream as _TokenStream
+    from src.parse import Parser as _Parser
+    from src.semantic import Semantic as _Semantic
+    from src.symbol_table import SymbolTable as _SymbolTable
+
+
+class CompileError(Exception):
+    """The errors of a source that does not compile.
+
+    Attributes:
+        errors (List[Exception]): Every syntax error, or the errors of the semantic analysis.
+    """
+
+    def __init__(self, errors):
+        super().__init__("\n".join(f"Error. {error}" for error in errors))
+        self.errors = list(errors)
+
+
+class Compilation:
+    """The context of one compilation.
+
+    Trees are only numbered from the compilation's own numbering inside a ``with`` block on it.
+
+    Attributes:
+        source (Path): The path of the source file.
+        output_dir (Path): The directory of every output file.
+        exe (str): The name of the executable, the stem of the source by default.
+        use_gcc (bool): If True, compile with the compiler of the config file instead of the native C compiler.
+        use_mmap (bool): If True, map the source into memory instead of reading it.
+        cache (Cache): The cache of frontend results, None to always run the frontend.
+        config_file (Path): The config file of the compiler used with `use_gcc`.
+        graphviz (str): The Graphviz program rendering the trees.
+        node_numbers (Iterator[int]): The numbers of the tree nodes of this compilation.
+    """
+
+    def __init__(self, source, exe: str = None, output_dir=None, use_gcc=False, use_mmap=False, use_cache=True,
+                 config_file="jcosim.config.json"):
+        """Compilation constructor.
+
+        Args:
+            source (str | Path): The path of the source file.
+            exe (str): The name of the executable. Optional, the stem of the source by default.
+            output_dir (str | Path): The directory of every output file. Optional, the current directory by default.
+            use_gcc (bool): If True, compile with the compiler of the config file instead of the native C compiler.
+            use_mmap (bool): If True, map the source into memory instead of reading it.
+            use_cache (bool): If True, look the source up in the cache and store the results of the frontend.
+            config_file (str | Path): The config file of the compiler used with `use_gcc`.
+        """
+        self.source = _Path(source)
+        self.output_dir = _Path.cwd() if output_dir is None else _Path(output_dir)
+        self.exe = exe or self.source.stem
+        self.use_gcc = use_gcc
+        self.use_mmap = use_mmap
+        self.cache = _Cache() if use_cache else None
+        self.config_file = _Path(config_file)
+        # Graphviz shipped in lib/bin is used when it is not installed
+        self.graphviz = _which("dot", path=_os.pathsep.join(
+            [_os.environ.get("PATH", ""), str(_Path("lib/bin").resolve())])) or "dot"
+        self.node_numbers = _count(1)
+        self.__numbering = None
+
+    def __enter__(self):
+        self.__numbering = _node_numbering(self.node_numbers)
+        self.__numbering.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        numbering, self.__numbering = self.__numbering, None
+        return numbering.__exit__(*exc_info)
+
+    def output_path(self, name) -> _Path:
+        """Returns the path of an output file.
+
+        Args:
+            name (str): The name of the output file.
+
+        Returns:
+            Path: The path of the file in the output directory.
+        """
+        return self.output_dir.joinpath(name)
+
+    def read(self):
+        """Reads the source file.
+
+        Returns:
+            str | mmap: The character stream of the source, or a read-only map of the file with `use_mmap`.
+        """
+        if self.use_mmap:
+            # Map the file instead of copying it, the mapping stays valid after the file is closed
+            with open(self.source, "rb") as f:
+                return _mmap(f.fileno(), 0, access=_ACCESS_READ)
+        with open(self.source, "r") as f:
+            return f.read()
+
+    def analyze(self, buffer=None, tokens=True) -> _Tuple:
+        """Runs the frontend: lexer, parser, symbol table and semantic analysis, or loads its results from the cache.
+
+        Args:
+            buffer (str | bytes-like): The character stream of the source. Optional, the source file is read by
+                default.
+            tokens (bool): If False, the token stream is not rebuilt from a cache entry, and is None.
+
+        Returns:
+            Tuple[TokenStream, programTree, SymbolTable, programTree]: The token stream, program tree, symbol table
+                and analyzed program tree.
+
+        Raises:
+            CompileError: With every syntax error, or the errors of the semantic analysis.
+        """
+        if buffer is None:
+            buffer = self.read()
+        lexer = _Lexer(buffer)
+
+        # Look up the results of an earlier compilation of the same source
+        cache_key = _Cache.key(buffer) if self.cache else None
+        entry = self.cache.load(cache_key) if self.cache else None
+        if entry:
+            # Skip straight to code generation
+            token_stream = _TokenStream.from_columns(lexer, *entry.token_columns) if tokens else None
+            stb = _SymbolTable.from_data(entry.symbol_table, lexer.line_index)
+            return token_stream, entry.program_tree, stb, entry.analyzed_tree
+
+        # Lexing
+        token_stream = _TokenStream(lexer)
+
+        # Parsing, which generates the symbol table too
+        stb = _SymbolTable(line_index=token_stream.line_index)
+        parser = _Parser(token_stream, symbolTable=stb)
+        program_tree = parser.program()
+        if parser.errors:
+            raise CompileError(parser.errors)
+
+        # Semantic
+        analyzed_tree, errors = _Semantic(program_tree, stb).check()
+        if errors:
+            raise CompileError(errors)
+
+        if self.cache:
+            self.cache.store(cache_key, _CacheEntry(token_stream.columns(), program_tree, stb.data, analyzed_tree))
+        return token_stream, program_tree, stb, analyzed_tree
+
+    @staticmethod
+    def generate(analyzed_tree, stb) -> str:
+        """Generates the C code of an analyzed program tree.
+
+        Args:
+            analyzed_tree (programTree): The analyzed program tree.
+            stb (SymbolTable): The symbol table of the source.
+
+        Returns:
+            str: The C code.
+        """
+        return _CodeGen(analyzed_tree, stb).generate_code()
+
+    def build(self, code):
+        """Compiles C code into the executable, in the output directory.
+
+        Args:
+            code (str): The C code.
+        """
+        src_file = self.output_path(f"{self.exe}.c")
+        # Save code to source file first
+        with open(src_file, "w") as f:
+            f.write(code)
+        # Call native C compiler
+        try:
+            if self.use_gcc:
+                cc = _CustomGCC(src_file=str(src_file), exe_file=str(self.output_path(self.exe)),
+                                config_file=self.config_file)
+            else:
+                cc = _CCompiler(src_file=str(src_file), exe_file=str(self.output_path(self.exe)))
+            cc.exe()
+        finally:
+            # Remove source code after finish
+            if src_file.exists():
+                src_file.unlink()
+
+    def compile(self) -> str:
+        """Runs the whole compilation of the source into the executable.
+
+        Returns:
+            str: The generated C code.
+
+        Raises:
+            CompileError: If the source does not compile.
+        """
+        _, _, stb, analyzed_tree = self.analyze(tokens=False)
+        code = self.generate(analyzed_tree, stb)
+        self.build(code)
+        return code
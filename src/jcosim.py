@@ -5,15 +5,9 @@ from sys import exit
 
 from pydot import Dot, Node, Edge
 
-from c_compiler import CCompiler, CustomGCC
-from codegen import CodeGen
-from lex import Lexer
-from parse import Parser
-from semantic import Semantic
-from symbol_table import SymbolTable
-import os
-
-os.environ["PATH"] += os.pathsep + os.path.abspath("./lib/bin")
+from ast import preorder
+from batch import analyze_files
+from compilation import Compilation, CompileError
 
 
 def section(title, work):
@@ -31,58 +25,75 @@ def help_text():
     return "Manual:", work
 
 
-def token_display(lexer):
+# Dumps are written a line or an entry at a time, and printed as they are written unless echo is False.
+def token_display(token_stream, outputFilePath, echo=True):
     def work():
-        lexer.reset()
-        tokens = '\n'.join(
-            map(str, list(lexer.tokens(ignore=False))))
-        print(tokens)
-        with Path('tokens.txt').resolve().open('w') as f:
-            f.write(tokens)
+        with Path(outputFilePath).resolve().open('w') as f:
+            separator = ''
+            for token in token_stream.tokens(ignore=False):
+                line = str(token)
+                f.write(separator + line)
+                separator = '\n'
+                if echo: print(line)
 
     return "Tokens:", work
 
 
-def symtable_display(stb):
-    from json import dump
-    from pprint import pprint
-
+def symtable_display(stb, outputFilePath, echo=True, compact=False):
     def work():
-        pprint(stb.data, indent=4, sort_dicts=False)
-        with Path("symtable.json").resolve().open("w") as f:
-            dump(stb.data, f, indent=4)
+        chunks = stb.data.iter_json_lines() if compact else stb.data.iter_json(indent=4)
+        with Path(outputFilePath).resolve().open('w') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                if echo: print(chunk, end='')
+        if echo and not compact: print()
 
     return "Symbol Table:", work
 
 
-def parsetree_display(program_tree, outputFilePath):
+def parsetree_display(program_tree, outputFilePath, prog='dot'):
     def work():
         graph = Dot(graph_name='Parse Tree', graph_type='graph')
-
-        def start_graph(g, node, parent_node_name=None):
-            g.add_node(Node(name=node.getNodeNum(), shape='plaintext', label=node.getLabel()))
-            if parent_node_name: g.add_edge(Edge(parent_node_name, node.getNodeNum()))
+        # Boxes are numbered per occurrence, shared leaves appear once for each parent.
+        # Pairs of box name and count of children still to draw, from the root down to the parent of the next node.
+        parents = []
+        for name, node in enumerate(preorder(program_tree), 1):
+            while parents and parents[-1][1] == 0:
+                parents.pop()
+            graph.add_node(Node(name=name, shape='plaintext', label=node.getLabel()))
+            if parents:
+                parents[-1][1] -= 1
+                graph.add_edge(Edge(parents[-1][0], name))
             if len(node.getKids()) > 0:
-                for kid in node.getKids(): start_graph(g, kid, node.getNodeNum())
+                parents.append([name, len(node.getKids())])
             else:
-                g.add_node(Node(name=f'{node.getNodeNum()}_content', shape='plaintext', label=node.getContent()))
-                g.add_edge(Edge(node.getNodeNum(), f'{node.getNodeNum()}_content'))
+                graph.add_node(Node(name=f'{name}_content', shape='plaintext', label=node.getContent()))
+                graph.add_edge(Edge(name, f'{name}_content'))
 
-        start_graph(graph, program_tree)
-        graph.write_png(outputFilePath if outputFilePath[-4:] == '.png' else outputFilePath + '.png')
+        path = str(outputFilePath)
+        graph.write_png(path if path[-4:] == '.png' else path + '.png', prog=prog)
 
     return "Generating Parse Tree . . .", work
 
 
-def gencode_display(code, exe):
+def gencode_display(code, outputFilePath):
     def work():
         print(code)
-        with Path(f"{exe}.c").resolve().open("w") as f:
+        with Path(outputFilePath).resolve().open("w") as f:
             f.write(code)
 
     return "Generating code . . .", work
 
 
+def batch_display(results):
+    def work():
+        for result in results:
+            for diagnostic in result.diagnostics or ("OK",):
+                print(f"{result.path}: {diagnostic}")
+
+    return "Checking files . . .", work
+
+
 def clean_display(files):
     def work():
         print(files)
@@ -90,24 +101,12 @@ def clean_display(files):
     return "Cleaning files", work
 
 
-def native_compile_display(code, exe, cc):
+def native_compile_display(compilation, code):
     def work():
-        # Save code to source file first
-        with open(f"{exe}.c", "w") as f:
-            f.write(code)
-        # Call native C compiler
         try:
-            if cc:
-                cc_class = CustomGCC
-            else:
-                cc_class = CCompiler
-            cc_class(src_file=f"{exe}.c", exe_file=exe).exe()
+            compilation.build(code)
         except Exception as e:
             print(e)
-        finally:
-            # Remove source code after finish
-            if Path(f'{exe}.c').exists():
-                Path(f'{exe}.c').unlink()
 
     return "Compiling with native C compiler", work
 
@@ -119,7 +118,7 @@ def main():
             raise GetoptError('ERROR: Input file must be specified')
         options, remainder = getopt(
             argv[1:],
-            'i:o:stuapgc:vh',
+            'i:o:stuapgc:mbqvh',
             [
                 'input=',
                 'output=',
@@ -130,11 +129,17 @@ def main():
                 'analy',
                 'gencode',
                 'clean=',
+                'mmap',
+                'batch',
+                'no-cache',
+                'quiet',
+                'compact',
                 'verbose',
                 'help',
             ])
 
         source = None
+        sources = []
         exe = None
         symtable = False
         token = False
@@ -144,6 +149,11 @@ def main():
         clean = False
         clean_path = '.'
         cc = False
+        use_mmap = False
+        batch = False
+        use_cache = True
+        echo = True
+        compact = False
 
         for opt, arg in options:
             if opt in ('-h', '--help'):
@@ -153,6 +163,7 @@ def main():
                 clean_path = arg
             elif opt in ('-i', '--input'):
                 source = arg
+                sources.append(arg)
             elif opt in ('-u', '--use-gcc'):
                 cc = True
             elif opt in ('-o', '--output'):
@@ -167,6 +178,16 @@ def main():
                 analyzedtree = True
             elif opt in ('-g', '--gencode'):
                 gencode = True
+            elif opt in ('-m', '--mmap'):
+                use_mmap = True
+            elif opt in ('-b', '--batch'):
+                batch = True
+            elif opt == '--no-cache':
+                use_cache = False
+            elif opt in ('-q', '--quiet'):
+                echo = False
+            elif opt == '--compact':
+                compact = True
             elif opt in ('-v', '--verbose'):
                 symtable = True
                 token = True
@@ -187,6 +208,7 @@ def main():
                 'parsetree.png',
                 'analyzedtree.png',
                 'symtable.json',
+                'symtable.jsonl',
                 f'{exe}.c',
                 f'{exe}.exe',
                 f'{exe}',
@@ -205,51 +227,41 @@ def main():
         if not source:
             raise GetoptError('ERROR: Input file must be specified')
 
-        # Smartly get exe file name
-        if not exe:
-            exe = Path(source).stem
-
-        # Read Java source file
-        with open(source, 'r') as f:
-            buffer = f.read()
-
-        # Lexing
-        lexer = Lexer(buffer)
-
-        # Parsing
-        parser = Parser(lexer)
-        program_tree = parser.program()
-
-        # Generate symbol table
-        lexer.reset()
-        stb = SymbolTable(lexer)
-
-        # Semantic
-        semantic = Semantic(program_tree, stb)
-        analyzed_tree = semantic.analyze()
-
-        # Generate C code
-        code_gen = CodeGen(analyzed_tree, stb)
-        code = code_gen.generate_code()
-
-        # Compile the code and output native binary
-        section(*native_compile_display(code, exe, cc))
-
-        # do things based on flags
-        if token:
-            section(*token_display(lexer))
-        if symtable:
-            section(*symtable_display(stb))
-        if parsetree:
-            section(*parsetree_display(program_tree, 'parsetree.png'))
-        if analyzedtree:
-            section(*parsetree_display(analyzed_tree, 'analyzedtree.png'))
-        if gencode:
-            section(*gencode_display(code, exe))
+        # check many files in parallel and exit
+        if batch:
+            results = analyze_files(sources + remainder)
+            section(*batch_display(results))
+            exit(0 if all(result.ok for result in results) else 1)
+
+        with Compilation(source, exe, use_gcc=cc, use_mmap=use_mmap, use_cache=use_cache) as compilation:
+            # Lexing, parsing, symbol table and semantic, or their cached results
+            token_stream, program_tree, stb, analyzed_tree = compilation.analyze(tokens=token)
+
+            # Generate C code
+            code = compilation.generate(analyzed_tree, stb)
+
+            # Compile the code and output native binary
+            section(*native_compile_display(compilation, code))
+
+            # do things based on flags
+            if token:
+                section(*token_display(token_stream, compilation.output_path('tokens.txt'), echo))
+            if symtable:
+                symtable_file = 'symtable.jsonl' if compact else 'symtable.json'
+                section(*symtable_display(stb, compilation.output_path(symtable_file), echo, compact))
+            if parsetree:
+                section(*parsetree_display(program_tree, compilation.output_path('parsetree.png'), compilation.graphviz))
+            if analyzedtree:
+                section(*parsetree_display(analyzed_tree, compilation.output_path('analyzedtree.png'),
+                                           compilation.graphviz))
+            if gencode:
+                section(*gencode_display(code, compilation.output_path(f'{compilation.exe}.c')))
 
     except GetoptError as e:
         section(*help_text())
         print(e)
+    except CompileError as e:
+        exit(str(e))
 
 
 if __name__ == '__main__':
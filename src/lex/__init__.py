@@ -13,52 +13,357 @@ Example:
 
     >>> for token in lexer.tokens():
     >>>     print(token)
+
+    # TokenStream lexes once and keeps the tokens for every later phase:
+
+    >>> from lex import TokenStream
+    >>>
+    >>> token_stream = TokenStream(lexer)
+    >>> token_stream[0]
+
+    # After an edit, only the tokens around it are lexed again:
+
+    >>> token_stream = token_stream.edit(offset, removed_length, inserted_text)
 """
 
 __all__ = [
+    "LineIndex",
     "Token",
     "LexerError",
     "Lexer",
+    "TokenStream",
+    "TokenStore",
 ]
 
+import re as _re
+from array import array as _array
+from bisect import bisect_left as _bisect_left
+from bisect import bisect_right as _bisect_right
 from enum import Enum as _Enum
+from itertools import islice as _islice
+from typing import AbstractSet as _AbstractSet
 from typing import Iterator as _Iterator
+from typing import List as _List
 from typing import Sequence as _Sequence
+from typing import Tuple as _Tuple
 
 try:
     import mapper as _mapper
+    from mapper import kinds as _kinds
 except ImportError:
     import src.mapper as _mapper
+    from src.mapper import kinds as _kinds
+
+
+def _longest_first(values) -> str:
+    """Returns the alternatives of a pattern matching any of the values, trying longer values first."""
+    return "|".join(_re.escape(value) for value in sorted(values, key=lambda value: (-len(value), value)))
+
+
+# A word runs until whitespace, the end of stream marker or a separator, as `Lexer._get_token` scans it.
+_WORD_TAIL = "[^ \\t\\r\\n\\0" + "".join(_re.escape(value) for value in sorted(_mapper.SEPARATOR_VALUES)) + "]*"
+
+# An operator character other than `&` and `|` followed by `=` is read as one token, even when it is not an
+# operator, which is then an error. Any other symbol is the longest separator or operator it starts with.
+_SYMBOL = "|".join([
+    _longest_first(_mapper.SEPARATOR_VALUES),
+    "[" + "".join(_re.escape(value) for value in sorted(_mapper.OPERATOR_VALUES)
+                  if len(value) == 1 and value not in "&|") + "]=",
+    _longest_first(_mapper.OPERATOR_VALUES),
+])
+
+# Master pattern for the regex engine. One match consumes what `Lexer._skip` would skip (at most one comment,
+# then whitespace) plus the next token. Alternatives are ordered the same way `Lexer._get_token` checks them.
+_MASTER_PATTERN = _re.compile(r"""
+    (?P<UNCLOSED>/(?=\*)(?!.*?\*/))
+  | (?://[^\n]*|/(?=\*).*?\*/)?[ \t\r\n]*
+    (?:
+        (?P<STRING>'.*?(?<!\\)'|".*?(?<!\\)")
+      | (?P<UNTERMINATED>['"])
+      | (?P<NUMBER>[0-9]+(?:\.[0-9]*)?[dDfF]?|\.[0-9]+[dDfF]?)
+      | (?P<WORD>[A-Za-z_]""" + _WORD_TAIL + r""")
+      | (?P<COMMENT>//[^\n]*)
+      | (?P<SYMBOL>""" + _SYMBOL + r""")
+      | (?P<EOF>\0|\Z)
+      | (?P<OTHER>.)
+    )
+""", _re.DOTALL | _re.VERBOSE)
+
+_WORD_TAIL_PATTERN = _re.compile(_WORD_TAIL)
+
+# The same patterns over byte buffers, where positions are byte offsets into UTF-8 encoded source.
+_BYTES_MASTER_PATTERN = _re.compile(_MASTER_PATTERN.pattern.encode(), _re.DOTALL | _re.VERBOSE)
+_BYTES_WORD_TAIL_PATTERN = _re.compile(_WORD_TAIL_PATTERN.pattern.encode())
+_BYTES_VALUE_TO_KIND = {value.encode(): kind for value, kind in _mapper.VALUE_TO_KIND.items()}
+
+
+class LineIndex:
+    """The start positions of the lines of a character stream.
+
+    Built once per stream, it looks up the line and the column of any position with a binary search, so scanners
+    can skip over the stream without keeping track of lines.
+
+    As the lexer has always counted, a line other than the first starts at the newline ending the previous line.
+
+    Attributes:
+        line_start_positions (array): The start position of every line, in order.
+    """
+
+    def __init__(self, stream):
+        """LineIndex constructor.
+
+        Args:
+            stream (str | bytes-like): The character stream, or a byte buffer over it.
+        """
+        newline = "\n" if isinstance(stream, str) else b"\n"
+        self.line_start_positions = _array("q", [0])
+        self.line_start_positions.extend(m.start() for m in _re.finditer(newline, stream))
+
+    def line_number(self, position) -> int:
+        """Returns the line number of the given position.
+
+        Args:
+            position (int): The position in the stream.
+
+        Returns:
+            int: The line number, starting from 1.
+        """
+        return _bisect_right(self.line_start_positions, position)
+
+    def locate(self, start_position, end_position=None) -> _Tuple[int, int]:
+        """Returns the line number and the column of a position, or of a span.
+
+        A span belongs to the line of its end, and its column is counted from the start of that line.
+
+        Args:
+            start_position (int): The position, or the start position of the span.
+            end_position (int): The end position of the span. Optional.
+
+        Returns:
+            Tuple[int, int]: The line number and the column.
+        """
+        line_number = self.line_number(start_position if end_position is None else end_position)
+        return line_number, start_position - self.line_start_position(line_number)
+
+    def position(self, start_position, end_position=None) -> str:
+        """Returns the position string of a position, or of a span.
+
+        Args:
+            start_position (int): The position, or the start position of the span.
+            end_position (int): The end position of the span. Optional.
+
+        Returns:
+            str: The position, its format is ``{line_number}:{position from the start of the line}``.
+        """
+        line_number, column = self.locate(start_position, end_position)
+        return f"{line_number:02d}:{column:02d}"
+
+    def line_start_position(self, line_number) -> int:
+        """Returns the start position of a line.
+
+        Args:
+            line_number (int): The line number, starting from 1.
+
+        Returns:
+            int: The start position of the line.
+        """
+        return self.line_start_positions[line_number - 1]
+
+    def _newline_runs(self) -> _List[_Tuple[_array, int, int, int]]:
+        """Returns the positions of the newlines, as `_EditedLineIndex` keeps them.
+
+        Returns:
+            List[Tuple[array, int, int, int]]: The runs of newline positions.
+        """
+        return [(self.line_start_positions, 1, len(self.line_start_positions), 0)]
+
+    def edit(self, offset, removed_length, inserted_text) -> "LineIndex":
+        """Returns the line index of the character stream after an edit, without scanning the stream again.
+
+        The newline positions around the edit are shared with this index, only the inserted text is scanned.
+
+        Args:
+            offset (int): The position of the edit in the character stream.
+            removed_length (int): The number of characters removed at the offset.
+            inserted_text (str): The text inserted at the offset.
+
+        Returns:
+            LineIndex: The line index of the edited character stream.
+        """
+        shift = len(inserted_text) - removed_length
+        runs = self._newline_runs()
+        # The newlines before the edit, the inserted ones, then the newlines after the edit shifted.
+        head = [(positions, start, _bisect_left(positions, offset - run_shift, start, stop), run_shift)
+                for positions, start, stop, run_shift in runs]
+        inserted = _array("q", (offset + m.start() for m in _re.finditer("\n", inserted_text)))
+        tail = [(positions, _bisect_left(positions, offset + removed_length - run_shift, start, stop), stop,
+                 run_shift + shift) for positions, start, stop, run_shift in runs]
+        return _EditedLineIndex(head + [(inserted, 0, len(inserted), 0)] + tail)
+
+
+class _EditedLineIndex(LineIndex):
+    """The line index of an edited character stream, made of runs of the newline positions of earlier indexes.
+
+    A run is a range of an array of newline positions, shifted by the edits after it. Lines are looked up with a
+    binary search over the runs, then over the positions of one run.
+
+    Attributes:
+        runs (List[Tuple[array, int, int, int]]): The runs: an array, the start and the stop of the range, and
+            the shift of its positions.
+    """
+
+    # Past this number of runs, the positions are copied into a single run, so looking up a line stays cheap.
+    MAX_RUNS = 64
+
+    def __init__(self, runs):
+        """_EditedLineIndex constructor.
+
+        Args:
+            runs (List[Tuple[array, int, int, int]]): The runs of newline positions, in order. Empty runs are
+                dropped.
+        """
+        runs = [run for run in runs if run[1] < run[2]]
+        if len(runs) > _EditedLineIndex.MAX_RUNS:
+            positions = _array("q")
+            for run_positions, start, stop, shift in runs:
+                positions.extend(position + shift for position in _islice(run_positions, start, stop))
+            runs = [(positions, 0, len(positions), 0)]
+        self.runs = runs
+        # The shifted position of the first newline of every run, and the number of newlines before it.
+        self.__first_positions = [positions[start] + shift for positions, start, _, shift in runs]
+        self.__counts = [0]
+        for _, start, stop, _ in runs:
+            self.__counts.append(self.__counts[-1] + stop - start)
+
+    @property
+    def line_start_positions(self) -> _array:
+        """array: The start position of every line, in order."""
+        line_start_positions = _array("q", [0])
+        for positions, start, stop, shift in self.runs:
+            line_start_positions.extend(position + shift for position in _islice(positions, start, stop))
+        return line_start_positions
+
+    def line_number(self, position) -> int:
+        index = _bisect_right(self.__first_positions, position) - 1
+        if index < 0:
+            return 1
+        positions, start, stop, shift = self.runs[index]
+        return self.__counts[index] + _bisect_right(positions, position - shift, start, stop) - start + 1
+
+    def line_start_position(self, line_number) -> int:
+        if line_number == 1:
+            return 0
+        newline = line_number - 2
+        index = _bisect_right(self.__counts, newline) - 1
+        positions, start, _, shift = self.runs[index]
+        return positions[start + newline - self.__counts[index]] + shift
+
+    def _newline_runs(self) -> _List[_Tuple[_array, int, int, int]]:
+        return self.runs
+
+
+def _char_at(stream, position):
+    """Returns the character at the given position, decoding UTF-8 if the stream is a byte buffer.
+
+    Args:
+        stream (str | bytes-like): The character stream, or a byte buffer over it.
+        position (int): The position of the character.
+
+    Returns:
+        Tuple[str, int]: The character, or null character "\0" if end of stream, and its size in the stream.
+    """
+    if position >= len(stream):
+        return "\0", 1
+    if isinstance(stream, str):
+        return stream[position], 1
+    lead = stream[position]
+    size = 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    try:
+        return str(stream[position:position + size], "utf-8"), size
+    except UnicodeDecodeError:
+        return "\ufffd", 1
+
+
+def _number_end(stream, position):
+    """Scans a number the same way `Lexer._get_token` does, including non-ASCII digits.
+
+    Args:
+        stream (str | bytes-like): The character stream, or a byte buffer over it.
+        position (int): The start position of the number, either a digit or a dot followed by a digit.
+
+    Returns:
+        int: The position right after the number.
+    """
+    char, size = _char_at(stream, position)
+    dotted = char == "."
+    position += size
+    char, size = _char_at(stream, position)
+    while char.isdigit():
+        position += size
+        char, size = _char_at(stream, position)
+    if not dotted and char == ".":
+        position += size
+        char, size = _char_at(stream, position)
+        while char.isdigit():
+            position += size
+            char, size = _char_at(stream, position)
+    if char in "dDfF":
+        position += size
+    return position
 
 
 class Token:
     """ A simple Token structure.
 
-    Contains the token position, name and value.
+    Contains the token position, kind and value. The line and the column are looked up in the line index of the
+    stream when they are read.
 
     Attributes:
-        position (str): The position of the token, its format is ``{line_number}:{position from the start of the line}``
-        token_name (str): The name of the token.
+        line_index (LineIndex): The line index of the stream.
+        start_position (int): The start position of the token in the stream.
+        end_position (int): The end position of the token in the stream.
+        kind (TokenKind): The kind of the token.
         value (str): The value of the token.
     """
 
-    def __init__(self, line_number, line_start_position, start_position, end_position, token_name, value):
+    __slots__ = ("line_index", "start_position", "end_position", "kind", "value")
+
+    def __init__(self, line_index, start_position, end_position, kind, value):
         """Token constructor.
 
         Args:
-            line_number (int): The current line number.
-            line_start_position (int): The start position of the current line.
+            line_index (LineIndex): The line index of the stream.
             start_position (int): The start position of the token.
             end_position (int): The end position of the token.
-            token_name (str): The name of the token.
+            kind (TokenKind): The kind of the token.
             value (str): The value of the token.
         """
-        self.position = f"{line_number:02d}:{(start_position - line_start_position):02d}"
-        self.__start_position = start_position
-        self.__end_position = end_position
-        self.token_name = token_name
+        self.line_index = line_index
+        self.start_position = start_position
+        self.end_position = end_position
+        self.kind = kind
         self.value = value
 
+    @property
+    def token_name(self):
+        """str: The name of the token, for display."""
+        return _mapper.KIND_NAMES[self.kind]
+
+    @property
+    def line_number(self):
+        """int: The line number of the token."""
+        return self.line_index.line_number(self.end_position)
+
+    @property
+    def column(self):
+        """int: The position of the token from the start of its line."""
+        return self.line_index.locate(self.start_position, self.end_position)[1]
+
+    @property
+    def position(self):
+        """str: The position of the token, its format is ``{line_number}:{position from the start of the line}``."""
+        return self.line_index.position(self.start_position, self.end_position)
+
     def key(self):
         """Returns the key for this token.
 
@@ -67,58 +372,100 @@ class Token:
         Returns:
             int: The key for this token.
         """
-        return self.__start_position
+        return self.start_position
 
     def check_token(self, *args) -> bool:
         """Check the token type whether it matches that of the passed argument.
 
         Args:
-            *args: The function takes only one argument, which can be a string, an enum object, or a sequence object.
+            *args: The function takes only one argument, which can be a token kind, a string, an enum object,
+                a sequence or a set.
 
         Returns:
             True if matches, False otherwise.
-                If the argument is a sequence, True if it contains this token type, False otherwise.
+                If the argument is a sequence or a set of kinds or names, True if it contains this token type,
+                False otherwise.
 
         Raises:
             TypeError: An error occurred when the argument is missing, or of incorrect types.
         """
         if len(args) == 1:
-            if isinstance(args[0], str):
+            if isinstance(args[0], int):
+                return self.kind == args[0]
+            elif isinstance(args[0], str):
                 return self.token_name == args[0]
             elif isinstance(args[0], _Enum):
                 return self.token_name == args[0].name
-            elif isinstance(args[0], _Sequence):
-                return self.token_name in args[0]
-        raise TypeError("_check_token() taking 1 argument, type: str, Enum or Sequence")
+            elif isinstance(args[0], (_Sequence, _AbstractSet)):
+                return self.kind in args[0] or self.token_name in args[0]
+        raise TypeError("_check_token() taking 1 argument, type: str, Enum, Sequence or Set")
 
     def __str__(self):
-        return f"{self.position:10}{self.__start_position:<10}{self.token_name:20}{self.value:20}"
+        return f"{self.position:10}{self.start_position:<10}{self.token_name:20}{self.value:20}"
 
     def __hash__(self):
-        return hash((self.position, self.__end_position, self.token_name, self.value))
+        return hash((self.position, self.end_position, self.kind, self.value))
 
     def __eq__(self, other):
         if isinstance(other, Token):
-            return self.position == other.position and self.token_name == other.token_name and self.value == other.value
+            return (self.position == other.position
+                    and self.kind == other.kind and self.value == other.value)
         return NotImplemented
 
 
+class _BufferToken(Token):
+    """A token over a byte buffer, its value is decoded from the buffer when it is read.
+
+    Attributes:
+        buffer (bytes-like): The byte buffer of the input file.
+    """
+
+    __slots__ = ("buffer",)
+
+    def __init__(self, line_index, start_position, end_position, kind, buffer):
+        """_BufferToken constructor.
+
+        Args:
+            line_index (LineIndex): The line index of the buffer.
+            start_position (int): The start position of the token.
+            end_position (int): The end position of the token.
+            kind (TokenKind): The kind of the token.
+            buffer (bytes-like): The byte buffer of the input file.
+        """
+        self.line_index = line_index
+        self.start_position = start_position
+        self.end_position = end_position
+        self.kind = kind
+        self.buffer = buffer
+
+    @property
+    def value(self):
+        """str: The value of the token, decoded from the buffer."""
+        # The EOF token at the end of the buffer has no character to decode.
+        return str(self.buffer[self.start_position:self.end_position + 1], "utf-8") or "\0"
+
+
 class LexerError(Exception):
     """Lexer exception.
 
     Attributes:
         position (int): The position in the stream where the error occurred.
+        line_index (LineIndex): The line index of the stream, None if not provided.
     """
 
-    def __init__(self, position, message: str = None):
+    def __init__(self, position, message: str = None, line_index: LineIndex = None):
         """LexerError constructor.
 
         Args:
             position (int): The start position of the error.
             message: Human readable description of the error. Optional.
+            line_index: The line index of the stream, to report the line of the error. Optional.
         """
         self.position = position
+        self.line_index = line_index
         self.__message = f"Unknown token at position {self.position}" if message is None else message
+        if line_index is not None:
+            self.__message += f", at line {line_index.position(position)}"
         super().__init__(self.__message)
 
 
@@ -126,22 +473,49 @@ class Lexer:
     """The lexer.
 
     Scans the file as stream and tokenize it.
+
+    Two engines produce the same tokens: ``"regex"`` matches one compiled master pattern per token,
+    ``"scan"`` walks the stream one character at a time.
+
+    The regex engine also accepts a byte buffer such as an `mmap` or a `memoryview` over UTF-8 source, so large
+    files are not copied into a string. Positions are then byte offsets and token values are decoded lazily.
     """
 
-    def __init__(self, character_stream):
+    ENGINES = ("regex", "scan")
+
+    def __init__(self, character_stream, engine="regex", line_index: LineIndex = None):
         """Lexer constructor.
 
         Args:
-            character_stream (str): The character stream of the input file.
+            character_stream (str | bytes-like): The character stream of the input file, or a byte buffer over it.
+            engine (str): The scanning engine, one of `Lexer.ENGINES`.
+            line_index (LineIndex): The line index of the character stream, if it is already known. Optional.
+
+        Raises:
+            ValueError: An error occurred when the engine is unknown, or cannot scan a byte buffer.
         """
+        if engine not in Lexer.ENGINES:
+            raise ValueError(f"Unknown lexer engine `{engine}`, expected one of {Lexer.ENGINES}")
+        if engine == "scan" and not isinstance(character_stream, str):
+            raise ValueError("The scan engine only accepts a str character stream")
+        self.__engine = engine
         self.__stream = character_stream
+        self.__line_index = LineIndex(character_stream) if line_index is None else line_index
         self.__EOF = False
-        self.__line_number = 1
-        self.__line_start_position = 0  # The position where the current line starts.
         self.__current_position = -1
         self.__current_char = ""
         self.__next_char()
 
+    @property
+    def character_stream(self):
+        """str | bytes-like: The character stream of the input file, or the byte buffer over it."""
+        return self.__stream
+
+    @property
+    def line_index(self) -> LineIndex:
+        """LineIndex: The line index of the character stream, shared by the tokens and errors of the lexer."""
+        return self.__line_index
+
     def __next_char(self):
         """Moves to the next character. Set `EOF` to True when end of file."""
         self.__current_position += 1
@@ -150,9 +524,6 @@ class Lexer:
             self.__EOF = True
         else:
             self.__current_char = self.__stream[self.__current_position]
-            if self.__current_char == "\n":
-                self.__line_number += 1
-                self.__line_start_position = self.__current_position
 
     def _peek(self):
         """Returns the lookahead character.
@@ -180,7 +551,7 @@ class Lexer:
                     self.__next_char()
                     if self.__EOF:  # Check unclosed comment
                         raise LexerError(
-                            last_position, f"Unclosed comment at position {last_position}")
+                            last_position, f"Unclosed comment at position {last_position}", self.__line_index)
                 self.__next_char()
                 self.__next_char()
 
@@ -204,10 +575,11 @@ class Lexer:
                 self.__next_char()
                 if self.__EOF:
                     raise LexerError(
-                        start_position, f"EOL while scanning string literal at position {start_position}")
+                        start_position, f"EOL while scanning string literal at position {start_position}",
+                        self.__line_index)
             self.__next_char()
-            token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                          _mapper.STRING, self.__stream[start_position:self.__current_position + 1])
+            token = Token(self.__line_index, start_position, self.__current_position,
+                          _kinds.STRING, self.__stream[start_position:self.__current_position + 1])
 
         # Checks double-quoted string.
         elif self.__current_char == '"':
@@ -215,10 +587,11 @@ class Lexer:
             while not (self.__current_char != "\\" and self._peek() == '"'):
                 self.__next_char()
                 if self.__EOF:
-                    raise LexerError(start_position, f"EOL while scanning string literal at position {start_position}")
+                    raise LexerError(start_position, f"EOL while scanning string literal at position {start_position}",
+                                     self.__line_index)
             self.__next_char()
-            token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                          _mapper.STRING, self.__stream[start_position:self.__current_position + 1])
+            token = Token(self.__line_index, start_position, self.__current_position,
+                          _kinds.STRING, self.__stream[start_position:self.__current_position + 1])
 
         # Checks number begins with a digit.
         elif self.__current_char.isdigit():
@@ -231,8 +604,8 @@ class Lexer:
                     self.__next_char()
             if self._peek() in ["d", "D", "f", "F"]:
                 self.__next_char()
-            token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                          _mapper.NUMBER, self.__stream[start_position:self.__current_position + 1])
+            token = Token(self.__line_index, start_position, self.__current_position,
+                          _kinds.NUMBER, self.__stream[start_position:self.__current_position + 1])
 
         # Checks number begins with a dot.
         elif self.__current_char == ".":
@@ -242,98 +615,180 @@ class Lexer:
                     self.__next_char()
                 if self._peek() in ["d", "D", "f", "F"]:
                     self.__next_char()
-                token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                              _mapper.NUMBER, self.__stream[start_position:self.__current_position + 1])
+                token = Token(self.__line_index, start_position, self.__current_position,
+                              _kinds.NUMBER, self.__stream[start_position:self.__current_position + 1])
             else:
-                token = Token(self.__line_number, self.__line_start_position,
-                              self.__current_position, self.__current_position,
-                              _mapper.Separators(self.__current_char).name, self.__current_char)
+                raise LexerError(self.__current_position, line_index=self.__line_index)
 
         # Checks word begins with an alphabetic letter or an underscore.
         elif self.__current_char.isalpha() or self.__current_char == "_":
             start_position = self.__current_position
             while True:
-                if (self._peek() in [" ", "\t", "\r", "\n", "\0"]
-                        or self._peek() in _mapper.Separators.values()
-                        or self._peek() in _mapper.Separators.values()):
+                if self._peek() in [" ", "\t", "\r", "\n", "\0"] or self._peek() in _mapper.SEPARATOR_VALUES:
                     break
                 self.__next_char()
             word = self.__stream[start_position:self.__current_position + 1]
-            # Checks if word is a keyword.
-            if word in _mapper.Keywords.values():
-                token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                              _mapper.Keywords(word).name, word)
-            elif word in _mapper.KeywordsType.values():
-                token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                              _mapper.KeywordsType(word).name, word)
-            elif word in _mapper.KeywordsAttribute.values():
-                token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                              _mapper.KeywordsAttribute(word).name, word)
-            # Otherwise put it as identifier.
-            else:
-                token = Token(self.__line_number, self.__line_start_position, start_position, self.__current_position,
-                              _mapper.IDENTIFIER, word)
+            # Checks if word is a keyword, otherwise put it as identifier.
+            token = Token(self.__line_index, start_position, self.__current_position,
+                          _mapper.VALUE_TO_KIND.get(word, _kinds.IDENTIFIER), word)
 
         # Checks if is a separator.
-        elif self.__current_char in _mapper.Separators.values():
-            token = Token(self.__line_number, self.__line_start_position,
+        elif self.__current_char in _mapper.SEPARATOR_VALUES:
+            token = Token(self.__line_index,
                           self.__current_position, self.__current_position,
-                          _mapper.Separators(self.__current_char).name, self.__current_char)
+                          _mapper.VALUE_TO_KIND[self.__current_char], self.__current_char)
 
         # Checks if is an operator.
-        elif self.__current_char in _mapper.Operators.values():
+        elif self.__current_char in _mapper.OPERATOR_VALUES:
             last_position = self.__current_position
             if self.__current_char not in ["&", "|"] and self._peek() == "=":
                 val = self.__current_char + self._peek()
+                if val not in _mapper.OPERATOR_VALUES:
+                    raise LexerError(last_position, line_index=self.__line_index)
                 self.__next_char()
-                token = Token(self.__line_number, self.__line_start_position, last_position, self.__current_position,
-                              _mapper.Operators(val).name, val)
+                token = Token(self.__line_index, last_position, self.__current_position,
+                              _mapper.VALUE_TO_KIND[val], val)
             elif self.__current_char == "+" and self._peek() == "+":
                 val = self.__current_char + self._peek()
                 self.__next_char()
-                token = Token(self.__line_number, self.__line_start_position, last_position, self.__current_position,
-                              _mapper.Operators(val).name, val)
+                token = Token(self.__line_index, last_position, self.__current_position,
+                              _mapper.VALUE_TO_KIND[val], val)
             elif self.__current_char == "-" and self._peek() == "-":
                 val = self.__current_char + self._peek()
                 self.__next_char()
-                token = Token(self.__line_number, self.__line_start_position, last_position, self.__current_position,
-                              _mapper.Operators(val).name, val)
+                token = Token(self.__line_index, last_position, self.__current_position,
+                              _mapper.VALUE_TO_KIND[val], val)
             elif self.__current_char == "&" and self._peek() == "&":
                 val = self.__current_char + self._peek()
                 self.__next_char()
-                token = Token(self.__line_number, self.__line_start_position, last_position, self.__current_position,
-                              _mapper.Operators(val).name, val)
+                token = Token(self.__line_index, last_position, self.__current_position,
+                              _mapper.VALUE_TO_KIND[val], val)
             elif self.__current_char == "|" and self._peek() == "|":
                 val = self.__current_char + self._peek()
                 self.__next_char()
-                token = Token(self.__line_number, self.__line_start_position, last_position, self.__current_position,
-                              _mapper.Operators(val).name, val)
+                token = Token(self.__line_index, last_position, self.__current_position,
+                              _mapper.VALUE_TO_KIND[val], val)
             elif self.__current_char == "/" and self._peek() == "/":
                 while self.__current_char != "\n":
                     self.__next_char()
                 return None
             else:
-                token = Token(self.__line_number, self.__line_start_position,
+                token = Token(self.__line_index,
                               self.__current_position, self.__current_position,
-                              _mapper.Operators(self.__current_char).name, self.__current_char)
+                              _mapper.VALUE_TO_KIND[self.__current_char], self.__current_char)
 
         # Checks if is EOF
         elif self.__current_char == "\0":
-            token = Token(self.__line_number, self.__line_start_position,
+            token = Token(self.__line_index,
                           self.__current_position, self.__current_position,
-                          _mapper.EOF, self.__current_char)
+                          _kinds.EOF, self.__current_char)
 
         # Raise error if is an unknown token.
         else:
-            raise LexerError(self.__current_position)
+            raise LexerError(self.__current_position, line_index=self.__line_index)
 
         self.__next_char()
         return token
 
-    def reset(self):
-        """Resets the lexer to its initial state."""
+    def _match_tokens(self, position=0) -> _Iterator[Token]:
+        """Generates the tokens of the stream with the master pattern.
+
+        Over a byte buffer, positions are byte offsets and the token values are only decoded when they are read.
+
+        Args:
+            position (int): The position to start from, either 0 or right after a token.
+
+        Yields:
+            Token: A token object, the same as `_get_token` would return.
+
+        Raises:
+            LexerError: An error occurred while getting tokens in the character stream.
+        """
+        stream = self.__stream
+        length = len(stream)
+        buffered = not isinstance(stream, str)
+        if buffered:
+            match = _BYTES_MASTER_PATTERN.match
+            match_word_tail = _BYTES_WORD_TAIL_PATTERN.match
+            get_kind = _BYTES_VALUE_TO_KIND.get
+            highest_ascii = 0x7f
+        else:
+            match = _MASTER_PATTERN.match
+            match_word_tail = _WORD_TAIL_PATTERN.match
+            get_kind = _mapper.VALUE_TO_KIND.get
+            highest_ascii = "\x7f"
+        identifier = _kinds.IDENTIFIER
+        line_index = self.__line_index
+        while position < length:
+            m = match(stream, position)
+            kind = m.lastgroup
+            start_position, position = m.span(kind)
+
+            if kind == "WORD":
+                token_kind = get_kind(m.group(kind), identifier)
+            elif kind == "SYMBOL":
+                token_kind = get_kind(m.group(kind))
+                if token_kind is None:
+                    raise LexerError(start_position, line_index=line_index)
+            elif kind == "NUMBER":
+                if position < length and stream[position] > highest_ascii:  # Might continue with non-ASCII digits.
+                    position = _number_end(stream, start_position)
+                token_kind = _kinds.NUMBER
+            elif kind == "STRING":
+                token_kind = _kinds.STRING
+            elif kind == "COMMENT":
+                continue
+            elif kind == "EOF":
+                position = start_position + 1
+                token_kind = _kinds.EOF
+            elif kind == "UNCLOSED":
+                raise LexerError(start_position, f"Unclosed comment at position {start_position}", line_index)
+            elif kind == "UNTERMINATED":
+                raise LexerError(start_position, f"EOL while scanning string literal at position {start_position}",
+                                 line_index)
+            else:  # Non-ASCII letters and digits, or an unknown character.
+                char, size = _char_at(stream, start_position)
+                if char.isalpha():
+                    position = match_word_tail(stream, start_position + size).end()
+                    token_kind = identifier
+                elif char.isdigit() or (char == "." and _char_at(stream, position)[0].isdigit()):
+                    position = _number_end(stream, start_position)
+                    token_kind = _kinds.NUMBER
+                else:
+                    raise LexerError(start_position, line_index=line_index)
+
+            if buffered:
+                yield _BufferToken(line_index, start_position, position - 1, token_kind, stream)
+            else:
+                # The EOF token at the end of the stream has no character to slice.
+                yield Token(line_index, start_position, position - 1, token_kind, stream[start_position:position] or "\0")
+
+    def _scan_tokens(self, position=0) -> _Iterator[Token]:
+        """Generates the tokens of the stream with `_get_token`.
+
+        Args:
+            position (int): The position to start from, either 0 or right after a token.
+
+        Yields:
+            Token: A token object.
+
+        Raises:
+            LexerError: An error occurred while getting tokens in the character stream.
+        """
+        self.reset(position)
+        while not self.__EOF:
+            token = self._get_token()
+            if token is not None:
+                yield token
+
+    def reset(self, position=0):
+        """Resets the lexer to its initial state.
+
+        Args:
+            position (int): The position to scan from. Optional.
+        """
         self.__EOF = False
-        self.__current_position = -1
+        self.__current_position = position - 1
         self.__current_char = ""
         self.__next_char()
 
@@ -349,16 +804,465 @@ class Lexer:
         Raises:
             LexerError: An error occurred while getting tokens in the character stream.
         """
-        self.reset()
+        tokens = self._generate_tokens()
+        return _skip_ignored(tokens) if ignore else tokens
+
+    def _generate_tokens(self, position=0) -> _Iterator[Token]:
+        """Generates the tokens of the stream with the engine of the lexer.
+
+        Args:
+            position (int): The position to start from, either 0 or right after a token.
+
+        Returns:
+            Iterator[Token]: An iterator over the tokens.
+        """
+        return self._match_tokens(position) if self.__engine == "regex" else self._scan_tokens(position)
+
+    def relex(self, tokens, offset, removed_length, inserted_text) -> _Tuple["Lexer", _Sequence[Token]]:
+        """Lexes the character stream after an edit, reusing the tokens that the edit does not change.
+
+        Lexing restarts after the last token ending before the edit, as the lexer looks one character past a token,
+        and stops as soon as a new token lines up with a previous token again. The previous tokens before and after
+        the lexed ones are not copied: they are read from `tokens`, shifted to their new positions when they are
+        read. The line index is edited the same way, so the work grows with the size of the edit rather than the
+        size of the file.
+
+        Args:
+            tokens (Sequence[Token]): All of the tokens of this lexer, as ``tokens(ignore=False)`` yields them.
+            offset (int): The position of the edit in the character stream.
+            removed_length (int): The number of characters removed at the offset.
+            inserted_text (str): The text inserted at the offset.
+
+        Returns:
+            Tuple[Lexer, Sequence[Token]]: A lexer over the edited character stream, and all of its tokens.
+
+        Raises:
+            ValueError: An error occurred when the character stream is not a str, or the edit is out of its range.
+            LexerError: An error occurred while getting tokens in the edited character stream.
+        """
+        lexer, kept, new_tokens, resumed, shift = self._relex(tokens, offset, removed_length, inserted_text)
+        return lexer, _splice_tokens(tokens, kept, new_tokens, resumed, shift, lexer.line_index)
+
+    def _relex(self, tokens, offset, removed_length, inserted_text) -> _Tuple["Lexer", int, _List[Token], int, int]:
+        """Lexes the part of the character stream that an edit changes, see `relex`.
+
+        Args:
+            tokens (Sequence[Token]): All of the tokens of this lexer, as ``tokens(ignore=False)`` yields them.
+            offset (int): The position of the edit in the character stream.
+            removed_length (int): The number of characters removed at the offset.
+            inserted_text (str): The text inserted at the offset.
+
+        Returns:
+            Tuple[Lexer, int, List[Token], int, int]: A lexer over the edited character stream, the number of
+                previous tokens kept before the edit, the lexed tokens, the index of the first previous token kept
+                after them, and the shift of the positions of the previous tokens kept after them.
+
+        Raises:
+            ValueError: An error occurred when the character stream is not a str, or the edit is out of its range.
+            LexerError: An error occurred while getting tokens in the edited character stream.
+        """
+        stream = self.__stream
+        if not isinstance(stream, str):
+            raise ValueError("Only a str character stream can be edited")
+        if offset < 0 or removed_length < 0 or offset + removed_length > len(stream):
+            raise ValueError(f"Edit out of the range of the character stream of length {len(stream)}")
+        lexer = Lexer(stream[:offset] + inserted_text + stream[offset + removed_length:], self.__engine,
+                      self.__line_index.edit(offset, removed_length, inserted_text))
+        shift = len(inserted_text) - removed_length
+        inserted_end = offset + len(inserted_text)
+
+        # Binary search for the first token that the edit might change.
+        low, high = 0, len(tokens)
+        while low < high:
+            middle = (low + high) // 2
+            if tokens[middle].end_position + 1 < offset:
+                low = middle + 1
+            else:
+                high = middle
+        # The kept tokens lie before the edit, where the lines of both streams are the same.
+        new_tokens = []
+        index = low  # The previous token to line up with.
+        for token in lexer._generate_tokens(tokens[low - 1].end_position + 1 if low else 0):
+            new_tokens.append(token)
+            if token.start_position < inserted_end:
+                continue
+            start_position = token.start_position - shift
+            while index < len(tokens) and tokens[index].start_position < start_position:
+                index += 1
+            if index == len(tokens):
+                continue
+            previous = tokens[index]
+            if (previous.start_position == start_position and previous.end_position == token.end_position - shift
+                    and previous.kind == token.kind):
+                # Both streams are the same from here on, so are the tokens.
+                return lexer, low, new_tokens, index + 1, shift
+        return lexer, low, new_tokens, len(tokens), shift
+
+
+class _TokenChain(_Sequence):
+    """The tokens of an edited character stream, made of runs of the token sequences of earlier streams.
+
+    A run is a range of a token sequence. Its tokens are read unchanged, or created at their shifted positions
+    with the line index of the edited stream when they are read, so the tokens of an edit are not copied.
+
+    Attributes:
+        runs (List[Tuple[Sequence[Token], int, int, int, LineIndex]]): The runs: a token sequence, the start and
+            the stop of the range, the shift of the positions and the line index of its tokens, None to read them
+            unchanged.
+    """
+
+    # Past this number of runs, the tokens are copied into a list, so reading a token stays cheap.
+    MAX_RUNS = 64
+
+    def __init__(self, runs):
+        """_TokenChain constructor.
+
+        Args:
+            runs (List[Tuple[Sequence[Token], int, int, int, LineIndex]]): The runs, in order. Empty runs are
+                dropped.
+        """
+        self.runs = [run for run in runs if run[1] < run[2]]
+        # The index of the first token of every run.
+        self.offsets = [0]
+        for _, start, stop, _, _ in self.runs:
+            self.offsets.append(self.offsets[-1] + stop - start)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        offsets = self.offsets
+        if index < 0:
+            index += offsets[-1]
+        if not 0 <= index < offsets[-1]:
+            raise IndexError("token index out of range")
+        run = _bisect_right(offsets, index) - 1
+        tokens, start, _, shift, line_index = self.runs[run]
+        token = tokens[start + index - offsets[run]]
+        if line_index is None:
+            return token
+        return Token(line_index, token.start_position + shift, token.end_position + shift, token.kind, token.value)
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __iter__(self):
+        for tokens, start, stop, shift, line_index in self.runs:
+            if line_index is None:
+                yield from _islice(tokens, start, stop)
+            else:
+                for token in _islice(tokens, start, stop):
+                    yield Token(line_index, token.start_position + shift, token.end_position + shift, token.kind,
+                                token.value)
+
+
+def _token_runs(tokens, start, stop, shift=0, line_index=None) -> _List[_Tuple]:
+    """Returns the runs of a range of tokens, to build a `_TokenChain` from.
+
+    Args:
+        tokens (Sequence[Token]): The tokens.
+        start (int): The index of the first token of the range.
+        stop (int): The index after the last token of the range.
+        shift (int): The shift of the positions of the tokens. Optional.
+        line_index (LineIndex): The line index of the shifted tokens, None to keep the ones of the tokens.
+
+    Returns:
+        List[Tuple[Sequence[Token], int, int, int, LineIndex]]: The runs of the range.
+    """
+    if not isinstance(tokens, _TokenChain):
+        return [(tokens, start, stop, shift, line_index)]
+    runs = []
+    for (run_tokens, run_start, run_stop, run_shift, run_line_index), offset in zip(tokens.runs, tokens.offsets):
+        low = max(start, offset)
+        high = min(stop, offset + run_stop - run_start)
+        if low < high:
+            runs.append((run_tokens, run_start + low - offset, run_start + high - offset, run_shift + shift,
+                         run_line_index if line_index is None else line_index))
+    return runs
+
+
+def _chain_tokens(runs) -> _Sequence[Token]:
+    """Returns the tokens of runs, as a `_TokenChain`, or as a list past `_TokenChain.MAX_RUNS` runs.
+
+    Args:
+        runs (List[Tuple[Sequence[Token], int, int, int, LineIndex]]): The runs, in order.
+
+    Returns:
+        Sequence[Token]: The tokens.
+    """
+    tokens = _TokenChain(runs)
+    return list(tokens) if len(tokens.runs) > _TokenChain.MAX_RUNS else tokens
+
+
+def _splice_tokens(tokens, kept, new_tokens, resumed, shift, line_index) -> _Sequence[Token]:
+    """Returns the tokens of an edited character stream: the kept previous tokens, the lexed tokens, then the
+    previous tokens after them, shifted.
+
+    Args:
+        tokens (Sequence[Token]): The previous tokens.
+        kept (int): The number of previous tokens kept before the lexed tokens.
+        new_tokens (List[Token]): The lexed tokens.
+        resumed (int): The index of the first previous token kept after the lexed tokens.
+        shift (int): The shift of the positions of the previous tokens kept after the lexed tokens.
+        line_index (LineIndex): The line index of the edited character stream.
+
+    Returns:
+        Sequence[Token]: The tokens.
+    """
+    return _chain_tokens(_token_runs(tokens, 0, kept) + [(new_tokens, 0, len(new_tokens), 0, None)]
+                         + _token_runs(tokens, resumed, len(tokens), shift, line_index))
+
+
+def _first_token_from(tokens, position) -> int:
+    """Returns the index of the first token starting at or after a position, with a binary search.
+
+    Args:
+        tokens (Sequence[Token]): The tokens, in order.
+        position (int): The position.
+
+    Returns:
+        int: The index of the token, ``len(tokens)`` if there is none.
+    """
+    low, high = 0, len(tokens)
+    while low < high:
+        middle = (low + high) // 2
+        if tokens[middle].start_position < position:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _skip_ignored(tokens) -> _Iterator[Token]:
+    """Filters out the tokens before the class declaration and the unsupported tokens.
+
+    Args:
+        tokens (Iterable[Token]): The tokens to filter.
+
+    Yields:
+        Token: A supported token.
+    """
+    header = True
+    for token in tokens:
+        if header and token.kind != _kinds.KEYWORD_CLASS:
+            continue
+        else:
+            header = False
+        if token.kind in _mapper.IGNORED_KINDS:
+            continue
+        yield token
+
+
+# Token kinds indexed by the ints stored in `TokenStore.kinds`.
+_KINDS = tuple(_mapper.TokenKind)
+
+
+def _column_token(stream, line_index, kind, start_position, end_position) -> Token:
+    """Creates a token of the character stream from its columns, with its value sliced from the stream."""
+    if not isinstance(stream, str):
+        return _BufferToken(line_index, start_position, end_position, kind, stream)
+    value = "\0" if kind == _kinds.EOF else stream[start_position:end_position + 1]
+    return Token(line_index, start_position, end_position, kind, value)
+
+
+class TokenStream(_Sequence):
+    """A materialized collection of tokens.
+
+    The character stream is lexed once, then every phase reads the same tokens. Indexing, iterating and `len`
+    go over the supported tokens, the same ones `Lexer.tokens()` yields.
+
+    Attributes:
+        line_index (LineIndex): The line index of the character stream.
+    """
+
+    def __init__(self, lexer: Lexer, tokens=None, supported_tokens=None):
+        """TokenStream constructor.
+
+        Args:
+            lexer: The lexer for generating the tokens.
+            tokens (Sequence[Token]): All of the tokens of the lexer, if it has already been lexed. Optional.
+            supported_tokens (Sequence[Token]): The supported tokens among `tokens`, if they are already known.
+                Optional.
+
+        Raises:
+            LexerError: An error occurred while getting tokens in the character stream.
+        """
+        self.__lexer = lexer
+        self.line_index = lexer.line_index
+        self.__all_tokens = list(lexer.tokens(ignore=False)) if tokens is None else tokens
+        self.__tokens = list(_skip_ignored(self.__all_tokens)) if supported_tokens is None else supported_tokens
+
+    def edit(self, offset, removed_length, inserted_text) -> "TokenStream":
+        """Returns the token stream of the edited character stream, re-lexing only around the edit.
+
+        The supported tokens before and after the lexed ones are reused like the others, see `Lexer.relex`, unless
+        the edit reaches the class declaration, before which every token is ignored.
+
+        Args:
+            offset (int): The position of the edit in the character stream.
+            removed_length (int): The number of characters removed at the offset.
+            inserted_text (str): The text inserted at the offset.
+
+        Returns:
+            TokenStream: The token stream of the edited character stream.
+
+        Raises:
+            ValueError: An error occurred when the character stream is not a str, or the edit is out of its range.
+            LexerError: An error occurred while getting tokens in the edited character stream.
+        """
+        all_tokens, supported_tokens = self.__all_tokens, self.__tokens
+        lexer, kept, new_tokens, resumed, shift = self.__lexer._relex(all_tokens, offset, removed_length,
+                                                                      inserted_text)
+        tokens = _splice_tokens(all_tokens, kept, new_tokens, resumed, shift, lexer.line_index)
+        # The supported tokens start with the class keyword, which must be before the lexed tokens.
+        kept_supported = _first_token_from(supported_tokens, all_tokens[kept - 1].end_position + 1) if kept else 0
+        if not kept_supported:
+            return TokenStream(lexer, tokens)
+        resumed_supported = len(supported_tokens)
+        if resumed < len(all_tokens):
+            resumed_supported = _first_token_from(supported_tokens, all_tokens[resumed].start_position)
+        new_supported_tokens = [token for token in new_tokens if token.kind not in _mapper.IGNORED_KINDS]
+        return TokenStream(lexer, tokens, _splice_tokens(supported_tokens, kept_supported, new_supported_tokens,
+                                                         resumed_supported, shift, lexer.line_index))
+
+    def tokens(self, ignore=True) -> _Iterator[Token]:
+        """An iterator over the stored tokens, with the same arguments as `Lexer.tokens`.
+
+        Args:
+            ignore (bool): If True, ignore all of the unsupported tokens.
+
+        Returns:
+            Iterator[Token]: An iterator over the tokens.
+        """
+        return iter(self.__tokens if ignore else self.__all_tokens)
+
+    def columns(self) -> _Tuple[_array, _array, _array]:
+        """Returns the kinds, start positions and end positions of all of the tokens, in `TokenStore` columns.
+
+        The columns and the character stream are enough to rebuild the tokens with `from_columns`.
+
+        Returns:
+            Tuple[array, array, array]: The kinds, start positions and end positions.
+        """
+        kinds = _array("B", [token.kind for token in self.__all_tokens])
+        start_positions = _array("q", [token.start_position for token in self.__all_tokens])
+        end_positions = _array("q", [token.end_position for token in self.__all_tokens])
+        return kinds, start_positions, end_positions
+
+    @classmethod
+    def from_columns(cls, lexer: Lexer, kinds, start_positions, end_positions) -> "TokenStream":
+        """Rebuilds a token stream from its columns, without lexing the character stream again.
+
+        Args:
+            lexer: The lexer of the character stream the columns were taken from.
+            kinds (array): The kind of every token.
+            start_positions (array): The start position of every token.
+            end_positions (array): The end position of every token.
+
+        Returns:
+            TokenStream: The token stream.
+        """
+        stream, line_index = lexer.character_stream, lexer.line_index
+        return cls(lexer, [_column_token(stream, line_index, _KINDS[kind], start_position, end_position)
+                           for kind, start_position, end_position in zip(kinds, start_positions, end_positions)])
+
+    def __getitem__(self, index):
+        return self.__tokens[index]
+
+    def __len__(self):
+        return len(self.__tokens)
+
+    def __iter__(self):
+        return iter(self.__tokens)
+
+
+class TokenStore(_Sequence):
+    """A struct-of-arrays collection of tokens for very large inputs.
+
+    Instead of one object per token, the kinds, start positions and end positions are kept in `array` columns.
+    Lines are looked up in the line index of the lexer. Token objects are only created when a consumer asks for
+    one, with their values sliced from the character stream.
+
+    It has the same interface as `TokenStream`: indexing, iterating and `len` go over the supported tokens.
+
+    Attributes:
+        kinds (array): The kind of every token, an index into the token names.
+        start_positions (array): The start position of every token.
+        end_positions (array): The end position of every token.
+        line_index (LineIndex): The line index of the character stream.
+    """
+
+    def __init__(self, lexer: Lexer):
+        """TokenStore constructor.
+
+        Args:
+            lexer: The lexer for generating the tokens.
+
+        Raises:
+            LexerError: An error occurred while getting tokens in the character stream.
+        """
+        self.__stream = lexer.character_stream
+        self.kinds = _array("B")
+        self.start_positions = _array("q")
+        self.end_positions = _array("q")
+        self.line_index = lexer.line_index
+
+        for token in lexer.tokens(ignore=False):
+            self.kinds.append(token.kind)
+            self.start_positions.append(token.start_position)
+            self.end_positions.append(token.end_position)
+
+        self.__all_indexes = range(len(self.kinds))
+        self.__indexes = _array("q")
         header = True
-        while not self.__EOF:
-            token = self._get_token()
-            if token is not None:
-                if ignore:
-                    if header and not token.check_token(_mapper.KeywordsType("class")):
-                        continue
-                    else:
-                        header = False
-                    if token.check_token(_mapper.Ignored.names()):
-                        continue
-                yield token
+        for index, kind in enumerate(self.kinds):
+            if header and kind != _kinds.KEYWORD_CLASS:
+                continue
+            header = False
+            if kind not in _mapper.IGNORED_KINDS:
+                self.__indexes.append(index)
+
+    def token_name(self, index) -> str:
+        """Returns the name of the supported token at the given index, without creating the token.
+
+        Args:
+            index (int): The index of the token.
+
+        Returns:
+            str: The name of the token.
+        """
+        return _mapper.KIND_NAMES[self.kinds[self.__indexes[index]]]
+
+    def _token(self, index) -> Token:
+        """Creates the token stored at the given column index.
+
+        Args:
+            index (int): The index of the token in the columns.
+
+        Returns:
+            Token: The token.
+        """
+        return _column_token(self.__stream, self.line_index, _KINDS[self.kinds[index]],
+                             self.start_positions[index], self.end_positions[index])
+
+    def tokens(self, ignore=True) -> _Iterator[Token]:
+        """A generator over the stored tokens, with the same arguments as `Lexer.tokens`.
+
+        Args:
+            ignore (bool): If True, ignore all of the unsupported tokens.
+
+        Yields:
+            Token: A token object.
+        """
+        for index in self.__indexes if ignore else self.__all_indexes:
+            yield self._token(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._token(i) for i in self.__indexes[index]]
+        return self._token(self.__indexes[index])
+
+    def __len__(self):
+        return len(self.__indexes)
+
+    def __iter__(self):
+        return self.tokens()
@@ -17,9 +17,35 @@ __all__ = [
     "items",
     "get_value_by_name",
     "code_mapper",
+    "NAME_TO_VALUE",
+    "VALUE_TO_NAME",
+    "KEYWORD_NAMES",
+    "KEYWORD_VALUES",
+    "TYPE_NAMES",
+    "TYPE_VALUES",
+    "ATTRIBUTE_NAMES",
+    "ATTRIBUTE_VALUES",
+    "OPERATOR_NAMES",
+    "OPERATOR_VALUES",
+    "SEPARATOR_NAMES",
+    "SEPARATOR_VALUES",
+    "IGNORED_NAMES",
+    "TokenKind",
+    "KIND_NAMES",
+    "NAME_TO_KIND",
+    "VALUE_TO_KIND",
+    "KEYWORD_KINDS",
+    "TYPE_KINDS",
+    "ATTRIBUTE_KINDS",
+    "OPERATOR_KINDS",
+    "SEPARATOR_KINDS",
+    "IGNORED_KINDS",
+    "OPERATOR_PRECEDENCE",
 ]
 
 from enum import Enum as _Enum
+from enum import IntEnum as _IntEnum
+from types import MappingProxyType as _MappingProxyType
 
 try:
     from mapper import code_mapper
@@ -68,10 +94,7 @@ def items():
 
 
 def get_value_by_name(name):
-    try:
-        return to_dict()[name]
-    except KeyError:
-        return None
+    return NAME_TO_VALUE.get(name)
 
 
 class _BaseEnum(_Enum):
@@ -188,3 +211,62 @@ class Separators(_BaseEnum):
     SEP_COLON = ":"
     SEP_SEMICOLON = ";"
     SEP_COMMA = ","
+
+
+# Frozen lookup tables, computed once so that classifying a token is a single dict or set lookup.
+NAME_TO_VALUE = _MappingProxyType(to_dict())
+# Keywords take precedence over types and attributes, the same order the lexer checks them.
+VALUE_TO_NAME = _MappingProxyType({
+    member.value: member.name
+    for enum in (Separators, Operators, KeywordsAttribute, KeywordsType, Keywords)
+    for member in enum
+})
+
+KEYWORD_NAMES = frozenset(Keywords.names())
+KEYWORD_VALUES = frozenset(Keywords.values())
+TYPE_NAMES = frozenset(KeywordsType.names())
+TYPE_VALUES = frozenset(KeywordsType.values())
+ATTRIBUTE_NAMES = frozenset(KeywordsAttribute.names())
+ATTRIBUTE_VALUES = frozenset(KeywordsAttribute.values())
+OPERATOR_NAMES = frozenset(Operators.names())
+OPERATOR_VALUES = frozenset(Operators.values())
+SEPARATOR_NAMES = frozenset(Separators.names())
+SEPARATOR_VALUES = frozenset(Separators.values())
+IGNORED_NAMES = frozenset(Ignored.names())
+
+# Token kinds, small ints for the frontend to compare instead of token names. Each kind is named after its token,
+# and `mapper.kinds` has them as module constants.
+TokenKind = _IntEnum("TokenKind", [
+    (name, kind) for kind, name in enumerate((EOF, IDENTIFIER, NUMBER, STRING) + tuple(names()))
+])
+KIND_NAMES = tuple(kind.name for kind in TokenKind)
+NAME_TO_KIND = _MappingProxyType(dict(TokenKind.__members__))
+VALUE_TO_KIND = _MappingProxyType({value: NAME_TO_KIND[name] for value, name in VALUE_TO_NAME.items()})
+
+KEYWORD_KINDS = frozenset(NAME_TO_KIND[name] for name in KEYWORD_NAMES)
+TYPE_KINDS = frozenset(NAME_TO_KIND[name] for name in TYPE_NAMES)
+ATTRIBUTE_KINDS = frozenset(NAME_TO_KIND[name] for name in ATTRIBUTE_NAMES)
+OPERATOR_KINDS = frozenset(NAME_TO_KIND[name] for name in OPERATOR_NAMES)
+SEPARATOR_KINDS = frozenset(NAME_TO_KIND[name] for name in SEPARATOR_NAMES)
+IGNORED_KINDS = frozenset(NAME_TO_KIND[name] for name in IGNORED_NAMES)
+
+# Precedence of the binary operators in the grammar, higher binds tighter. As the grammar has it, `|` and `^` are
+# additive, `&` is multiplicative, and equality is relational.
+OPERATOR_PRECEDENCE = _MappingProxyType({
+    TokenKind.OP_LOGIC_OR: 1,
+    TokenKind.OP_LOGIC_AND: 2,
+    TokenKind.OP_LT: 3,
+    TokenKind.OP_LTE: 3,
+    TokenKind.OP_GT: 3,
+    TokenKind.OP_GTE: 3,
+    TokenKind.OP_EQ: 3,
+    TokenKind.OP_NEQ: 3,
+    TokenKind.OP_ADD: 4,
+    TokenKind.OP_SUB: 4,
+    TokenKind.OP_BIT_OR: 4,
+    TokenKind.OP_BIT_XOR: 4,
+    TokenKind.OP_MUL: 5,
+    TokenKind.OP_DIV: 5,
+    TokenKind.OP_MOD: 5,
+    TokenKind.OP_BIT_AND: 5,
+})
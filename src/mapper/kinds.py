@@ -0,0 +1,23 @@
+"""The token kinds as module constants, named after their tokens.
+
+Reading a module constant is cheaper than reading an enum member, so the frontend compares token kinds
+against these. Each constant is the `TokenKind` member of the same name.
+
+Example:
+    >>> from mapper import kinds
+    >>>
+    >>> token.kind == kinds.SEP_SEMICOLON
+"""
+
+try:
+    from mapper import TokenKind as _TokenKind
+except ImportError:
+    from src.mapper import TokenKind as _TokenKind
+
+__all__ = list(_TokenKind.__members__) + ["NUMBER", "STRING"]
+
+globals().update(_TokenKind.__members__)
+
+# The same short names as the token name constants in `mapper`.
+NUMBER = _TokenKind.LITERAL_NUMBER
+STRING = _TokenKind.LITERAL_STRING
@@ -1,15 +1,14 @@
-import json
 import pathlib
 import sys
 
 try:
     from codegen import CodeGen
-    from lex import Lexer
+    from lex import Lexer, TokenStream
     from parse import Parser
     from symbol_table import SymbolTable
 except ImportError:
     from src.codegen import CodeGen
-    from src.lex import Lexer
+    from src.lex import Lexer, TokenStream
     from src.parse import Parser
     from src.symbol_table import SymbolTable
 
@@ -28,23 +27,26 @@ def main():
 
     print(f"{'':-<50}\nLexer Test")
 
-    lexer = Lexer(buffer)
+    token_stream = TokenStream(Lexer(buffer))
 
     with target_dir.joinpath("./tokens.txt").open("w") as f:
         print(f"{'Position':10}{'Stream':<10}{'Token name':20}{'Value':20}", file=f)
-        for token in lexer.tokens():
+        for token in token_stream:
             print(token, file=f)
     print("Lexing completed.")
 
     print(f"{'':-<50}\nSymbol Table Test")
-    symtable = SymbolTable(lexer)
+    symtable = SymbolTable(token_stream)
     with target_dir.joinpath("./symtable.json").open("w") as f:
-        json.dump(symtable.data, f, indent=4)
+        for chunk in symtable.data.iter_json(indent=4):
+            f.write(chunk)
     print("Symbol table completed.")
 
     print(f"{'':-<50}\nParser Test")
-    parser = Parser(lexer)
+    parser = Parser(token_stream)
     ast = parser.program()
+    if parser.errors:
+        sys.exit("\n".join(f"Error. {error}" for error in parser.errors))
     print("Parsing completed.")
 
     print(f"{'':-<50}\nCode Generator Test")
@@ -1,45 +1,93 @@
-__all__ = ["Parser"]
+__all__ = ["Parser", "ParserError"]
 
-from sys import exit
+from typing import Sequence as _Sequence
 
 try:
-    from ast import addOPTree, assignTree, blockTree, callTree, declrTree, endTree, funcDeclTree, funcHeadTree, idTree, \
-        ifTree, multOPTree, numberTree, programTree, relOPTree, returnTree, stringTree, typeTree, whileTree
+    import ast as _ast
+    from ast import addOPTree, multOPTree, relOPTree
+    from lex import LexerError as _LexerError
+    from lex import LineIndex as _LineIndex
+    from lex import Token as _Token
+    from lex import TokenStream as _TokenStream
     import mapper as _mapper
+    from mapper import kinds as _kinds
 except ImportError:
-    from src.ast import addOPTree, assignTree, blockTree, callTree, declrTree, endTree, funcDeclTree, funcHeadTree, \
-        idTree, ifTree, multOPTree, numberTree, programTree, relOPTree, returnTree, stringTree, typeTree, whileTree
+    import src.ast as _ast
+    from src.ast import addOPTree, multOPTree, relOPTree
+    from src.lex import LexerError as _LexerError
+    from src.lex import LineIndex as _LineIndex
+    from src.lex import Token as _Token
+    from src.lex import TokenStream as _TokenStream
     import src.mapper as _mapper
+    from src.mapper import kinds as _kinds
+
+
+# A syntax error, at the token where the parser found it.
+class ParserError(Exception):
+    def __init__(self, message, token):
+        self.token = token
+        super().__init__(message)
 
 
 # Parser object keeps track of current token and checks if the code matches the grammar.
+# Syntax errors do not stop it: each one is collected in errors, then the parser skips to the end of the statement.
 
 
 class Parser:
-    assignOPs = [_mapper.Operators("=").name,
-                 _mapper.Operators("+=").name,
-                 _mapper.Operators("-=").name,
-                 _mapper.Operators("*=").name,
-                 _mapper.Operators("/=").name,
-                 _mapper.Operators("%=").name]
-
-    relOPs = [_mapper.Operators("<").name,
-              _mapper.Operators("<=").name,
-              _mapper.Operators(">").name,
-              _mapper.Operators(">=").name,
-              _mapper.Operators("==").name,
-              _mapper.Operators("!=").name]
-
-    addOPs = [_mapper.Operators("+").name,
-              _mapper.Operators("-").name,
-              _mapper.Operators("|").name]
-
-    multOPs = [_mapper.Operators("*").name,
-               _mapper.Operators("/").name,
-               _mapper.Operators("&").name]
-
-    def __init__(self, lexer):
-        self.tokens = lexer.tokens()
+    assignOPs = [_kinds.OP_ASSIGN,
+                 _kinds.OP_ADD_ASSIGN,
+                 _kinds.OP_SUB_ASSIGN,
+                 _kinds.OP_MUL_ASSIGN,
+                 _kinds.OP_DIV_ASSIGN,
+                 _kinds.OP_MOD_ASSIGN]
+
+    relOPs = frozenset([_kinds.OP_LT,
+                        _kinds.OP_LTE,
+                        _kinds.OP_GT,
+                        _kinds.OP_GTE,
+                        _kinds.OP_EQ,
+                        _kinds.OP_NEQ])
+
+    addOPs = frozenset([_kinds.OP_ADD,
+                        _kinds.OP_SUB,
+                        _kinds.OP_BIT_OR])
+
+    multOPs = frozenset([_kinds.OP_MUL,
+                         _kinds.OP_DIV,
+                         _kinds.OP_BIT_AND])
+
+    # Tree class and precedence of each binary operator the grammar parses. More operators of
+    # `_mapper.OPERATOR_PRECEDENCE`, such as && and ||, only need an entry here.
+    binaryOPs = {
+        **{kind: (relOPTree, _mapper.OPERATOR_PRECEDENCE[kind]) for kind in relOPs},
+        **{kind: (addOPTree, _mapper.OPERATOR_PRECEDENCE[kind]) for kind in addOPs},
+        **{kind: (multOPTree, _mapper.OPERATOR_PRECEDENCE[kind]) for kind in multOPs},
+    }
+
+    # Type string of each type token kind.
+    typeValues = {kind: _mapper.NAME_TO_VALUE[kind.name] for kind in _mapper.TYPE_KINDS}
+
+    # Takes a lexer, or a token stream or token store to walk by index. Builds `_AST` objects, or emits the trees
+    # into an AstArena when one is given; then program() returns a handle on the root, the node at index 0.
+    # Given an empty SymbolTable, the parser populates it with the entries the token pass of SymbolTable makes for
+    # the same tokens, when they parse without errors.
+    def __init__(self, lexer, arena=None, symbolTable=None):
+        self.trees = _ast if arena is None else arena.trees
+        # Immutable leaves are shared by all of their occurrences, except in an arena where a node has one parent.
+        self.leaves = _ast.SharedLeaves() if arena is None else self.trees
+        self.binaryOPTrees = {kind: (getattr(self.trees, tree.__name__), precedence)
+                              for kind, (tree, precedence) in Parser.binaryOPs.items()}
+        self.tokens = lexer if isinstance(lexer, _Sequence) else _TokenStream(lexer)
+        self.tokenCount = len(self.tokens)
+        self.tokenIndex = -1  # Index of the peek token.
+        self.errors = []
+        self.symbolTable = symbolTable
+        # Past the last token, the parser sees an EOF token right after it.
+        if self.tokenCount:
+            last = self.tokens[self.tokenCount - 1]
+            self.endToken = _Token(last.line_index, last.end_position + 1, last.end_position + 1, _kinds.EOF, "\0")
+        else:
+            self.endToken = _Token(_LineIndex(""), 0, 0, _kinds.EOF, "\0")
         self.curToken = None
         self.peekToken = None
         self.nextToken()
@@ -47,265 +95,324 @@ class Parser:
 
     # Return true if the current token matches.
     def checkToken(self, kind):
-        return kind == self.curToken.token_name
+        return kind == self.curToken.kind
 
     # Return true if the next token matches.
     def checkPeek(self, kind):
-        return kind == self.peekToken.token_name
+        return kind == self.peekToken.kind
 
-    # Try to match current token. If not, error. Advances the current token.
+    # Try to match current token, against a kind or a list of kinds. If not, error. Advances the current token.
     def match(self, kinds):
-        if type(kinds) is not list:
-            kinds = [kinds]
-        doesMatch = False
-        for kind in kinds:
-            if self.checkToken(kind):
-                doesMatch = True
-                matchType = kind
-                break
-        if not doesMatch:
-            self.abort(
-                f'Expected {_mapper.get_value_by_name(kind)}, got {self.curToken.value}, at line {self.curToken.position}')
-        self.nextToken()
-        return matchType
+        kind = self.curToken.kind
+        if kind in kinds if type(kinds) is list else kind == kinds:
+            self.nextToken()
+            return kind
+        expected = kinds[-1] if type(kinds) is list else kinds
+        self.abort(
+            f'Expected {_mapper.get_value_by_name(expected.name)}, got {self.curToken.value}, at line {self.curToken.position}')
 
-    # Advances the current token.
+    # Advances the current token. Scopes of the symbol table open at each `{` and `(` and close at each `}` and `)`
+    # the parser consumes.
     def nextToken(self):
+        if self.symbolTable is not None and self.curToken is not None:
+            kind = self.curToken.kind
+            if kind == _kinds.SEP_BRACE_LEFT or kind == _kinds.SEP_PAREN_LEFT:
+                self.symbolTable.open_scope()
+            elif kind == _kinds.SEP_BRACE_RIGHT or kind == _kinds.SEP_PAREN_RIGHT:
+                self.symbolTable.close_scope()
         self.curToken = self.peekToken
-        self.peekToken = next(self.tokens, _mapper.EOF)
+        self.tokenIndex += 1
+        self.peekToken = self.tokens[self.tokenIndex] if self.tokenIndex < self.tokenCount else self.endToken
 
-    # No need to worry about passing the EOF, lexer handles that.
+    def abort(self, message):
+        raise ParserError(message, self.curToken)
 
-    @staticmethod
-    def abort(message):
-        exit("Error. " + message)
+    # Adds the identifier at the current token to the symbol table, declared with the type parsed right before it.
+    # Only tokens skipped after an error can unbalance the scopes, so leaving the outer scope is a syntax error.
+    def declare(self):
+        if self.symbolTable is not None:
+            try:
+                self.symbolTable.add_identifier(self.curToken)
+            except _LexerError as e:
+                self.abort(f'{e}, at line {self.curToken.position}')
+
+    # Collects the error, then skips to the end of the statement: past a `;` or past the `}` closing a block opened
+    # while skipping, or up to the `}` of the enclosing block. An error at the same token as the previous one is a
+    # consequence of it, so it is not collected again.
+    def recover(self, error):
+        if not self.errors or self.errors[-1].token.key() != error.token.key():
+            self.errors.append(error)
+        depth = 0
+        while not self.checkToken(_kinds.EOF):
+            if self.checkToken(_kinds.SEP_BRACE_LEFT):
+                depth += 1
+            elif self.checkToken(_kinds.SEP_BRACE_RIGHT):
+                if depth == 0:
+                    return
+                depth -= 1
+                if depth == 0:
+                    self.nextToken()
+                    return
+            elif self.checkToken(_kinds.SEP_SEMICOLON) and depth == 0:
+                self.nextToken()
+                return
+            self.nextToken()
 
     #             HELPER FUNCTION DECLARATIONS END HERE                   #
     # --------------------------------------------------------------------#
     #               PARSING LOGIC STARTS FROM HERE                        #
 
+    # Returns the program tree and the syntax errors. With errors, the tree only has the parts that parsed.
+    def parse(self):
+        return self.program(), self.errors
+
     def program(self):
-        t = programTree()
-        self.match(_mapper.KeywordsType("class").name)
-        self.match(_mapper.IDENTIFIER)
-        t.addKid(self.block())
+        t = self.trees.programTree()
+        try:
+            self.match(_kinds.KEYWORD_CLASS)
+            if self.symbolTable is not None:
+                self.symbolTable.declare_type(Parser.typeValues[_kinds.KEYWORD_CLASS])
+            if self.checkToken(_kinds.IDENTIFIER):
+                self.declare()
+            self.match(_kinds.IDENTIFIER)
+            t.addKid(_ast.trampoline(self.block()))
+        except ParserError as e:
+            self.recover(e)
         return t
 
+    # Blocks and the statements holding them are generators: they yield the statement or block nested in them and
+    # are sent back its tree, so `_ast.trampoline` runs nested blocks without recursion.
     def block(self):
-        self.match(_mapper.Separators("{").name)
-        t = blockTree()
+        self.match(_kinds.SEP_BRACE_LEFT)
+        t = self.trees.blockTree()
         while True:
-            try:
-                t.addKid(self.statement())
-            except SyntaxError:
-                break
-        self.match(_mapper.Separators("}").name)
-        return t
+            kind = self.curToken.kind
+            if kind in Parser.statementFirst:
+                try:
+                    t.addKid((yield self.statement()))
+                except ParserError as e:
+                    self.recover(e)
+            elif kind == _kinds.SEP_BRACE_RIGHT:
+                self.nextToken()
+                return t
+            else:
+                # A stray token, or the end of the stream with the block still open.
+                try:
+                    self.match(_kinds.SEP_BRACE_RIGHT)
+                except ParserError as e:
+                    self.recover(e)
+                if kind == _kinds.EOF:
+                    return t
 
     def decl(self, requireSemiColon=True):
         typ, name = self.typ(), self.name()
-        if self.checkToken(_mapper.Separators("(").name):
-            t = funcDeclTree().addKid(typ).addKid(name)
-            t.addKid(self.funcHead())
-            t.addKid(self.block())
-            return t
-        if self.checkToken(_mapper.Operators("=").name) and requireSemiColon:
+        if self.checkToken(_kinds.SEP_PAREN_LEFT):
+            return self.funcDecl(typ, name)
+        if self.checkToken(_kinds.OP_ASSIGN) and requireSemiColon:
             self.nextToken()
-            t = declrTree().addKid(typ).addKid(name).addKid(self.expr())
-            self.match(_mapper.Separators(";").name)
-            t.addKid(endTree())
+            t = self.trees.declrTree().addKid(typ).addKid(name).addKid(self.expr())
+            self.match(_kinds.SEP_SEMICOLON)
+            t.addKid(self.leaves.endTree())
             return t
-        t = declrTree().addKid(typ).addKid(name)
+        t = self.trees.declrTree().addKid(typ).addKid(name)
         if requireSemiColon:
-            self.match(_mapper.Separators(";").name)
-            t.addKid(endTree())
+            self.match(_kinds.SEP_SEMICOLON)
+            t.addKid(self.leaves.endTree())
         return t
 
-    def typ(self):
-        t = typeTree()
-        for name, value in _mapper.KeywordsType.items():
-            # key = _mapper.get_value_by_name(name)
-            if self.checkToken(name):
-                t.setType(value)
-                self.nextToken()
-                break
+    def funcDecl(self, typ, name):
+        t = self.trees.funcDeclTree().addKid(typ).addKid(name)
+        t.addKid((yield self.funcHead()))
+        t.addKid((yield self.block()))
+        return t
 
-        if t.getType == 'Type':
-            raise SyntaxError(f"Unrecognized type: {_mapper.get_value_by_name(self.curToken.token_name)}")
+    def typ(self):
+        value = Parser.typeValues.get(self.curToken.kind, '-1')
+        if value != '-1':
+            self.nextToken()
 
-        if self.checkToken(_mapper.Separators("[").name):
+        isList = False
+        if self.checkToken(_kinds.SEP_BRACKET_LEFT):
             self.nextToken()
-            self.match(_mapper.Separators("]").name)
-            t.setArray()
-        return t
+            self.match(_kinds.SEP_BRACKET_RIGHT)
+            isList = True
+        if self.symbolTable is not None and value != '-1':
+            self.symbolTable.declare_type(value + '[]' if isList else value)
+        return self.leaves.typeTree(isList, value)
 
     def name(self):
-        if self.checkToken(_mapper.IDENTIFIER):
-            t = idTree(self.curToken.value, self.curToken.key())
+        if self.checkToken(_kinds.IDENTIFIER):
+            t = self.trees.idTree(self.curToken.value, self.curToken.key())
+            self.declare()
             self.nextToken()
             return t
-        raise SyntaxError(
+        self.abort(
             f'Expected: {_mapper.IDENTIFIER}, got {_mapper.get_value_by_name(self.curToken.token_name)}, at line {self.curToken.position}')
 
     def funcHead(self):
-        self.match(_mapper.Separators("(").name)
-        t = funcHeadTree()
-        if not self.checkToken(_mapper.Separators(")").name):
+        self.match(_kinds.SEP_PAREN_LEFT)
+        t = self.trees.funcHeadTree()
+        if not self.checkToken(_kinds.SEP_PAREN_RIGHT):
             while True:
-                t.addKid(self.decl(requireSemiColon=False))
-                if self.checkToken(_mapper.Separators(",").name):
+                t.addKid((yield self.decl(requireSemiColon=False)))
+                if self.checkToken(_kinds.SEP_COMMA):
                     self.nextToken()
                 else:
                     break
-        self.match(_mapper.Separators(")").name)
+        self.match(_kinds.SEP_PAREN_RIGHT)
         return t
 
     def statement(self):
-        if self.curToken.token_name in _mapper.KeywordsType.names():
-            return self.decl()
-        if self.checkToken(_mapper.Keywords("if").name):
-            t = ifTree()
-            self.nextToken()
-            t.addKid(self.expr(True))
-            t.addKid(self.block())
-            if self.checkToken(_mapper.Keywords("else").name):
-                self.nextToken()
-                t.addKid(self.block())
-            return t
+        return Parser.statements[self.curToken.kind](self)
 
-        if self.checkToken(_mapper.Keywords("while").name):
-            t = whileTree()
+    def ifStatement(self):
+        t = self.trees.ifTree()
+        self.nextToken()
+        t.addKid(self.expr(True))
+        t.addKid((yield self.block()))
+        if self.checkToken(_kinds.KEYWORD_ELSE):
             self.nextToken()
-            t.addKid(self.expr(True))
-            t.addKid(self.block())
-            return t
+            t.addKid((yield self.block()))
+        return t
 
-        if self.checkToken(_mapper.Keywords("return").name):
-            t = returnTree()
-            self.nextToken()
-            t.addKid(self.expr())
-            self.match(_mapper.Separators(";").name)
-            t.addKid(endTree())
-            return t
+    def whileStatement(self):
+        t = self.trees.whileTree()
+        self.nextToken()
+        t.addKid(self.expr(True))
+        t.addKid((yield self.block()))
+        return t
 
-        if self.checkToken(_mapper.Separators("{").name):
-            return self.block()
+    def returnStatement(self):
+        t = self.trees.returnTree()
+        self.nextToken()
+        t.addKid(self.expr())
+        self.match(_kinds.SEP_SEMICOLON)
+        t.addKid(self.leaves.endTree())
+        return t
 
+    # A call or an assignment, both start with a name.
+    def nameStatement(self):
         kid = self.name()
 
-        if self.checkToken(_mapper.Separators("(").name):
+        if self.checkToken(_kinds.SEP_PAREN_LEFT):
             self.nextToken()
-            t = callTree().addKid(kid)
-            if not self.checkToken(_mapper.Separators(")").name):
+            t = self.trees.callTree().addKid(kid)
+            if not self.checkToken(_kinds.SEP_PAREN_RIGHT):
                 while True:
                     t.addKid(self.expr())
-                    if self.checkToken(_mapper.Separators(",").name):
+                    if self.checkToken(_kinds.SEP_COMMA):
                         self.nextToken()
                     else:
                         break
-            self.match(_mapper.Separators(")").name)
-            self.match(_mapper.Separators(";").name)
-            t.addKid(endTree())
+            self.match(_kinds.SEP_PAREN_RIGHT)
+            self.match(_kinds.SEP_SEMICOLON)
+            t.addKid(self.leaves.endTree())
             return t
 
-        t = assignTree(self.match(Parser.assignOPs)).addKid(kid)
+        t = self.trees.assignTree(self.match(Parser.assignOPs).name).addKid(kid)
         t.addKid(self.expr())
-        self.match(_mapper.Separators(";").name)
-        t.addKid(endTree())
+        self.match(_kinds.SEP_SEMICOLON)
+        t.addKid(self.leaves.endTree())
         return t
 
-    def expr(self, requireBracket=False):
-        if requireBracket:
-            self.match(_mapper.Separators("(").name)
-            requireBracket = True
-
-        kid = self.simpleExpr()
-        t = self.formRelationTree()
-        if t is None:
-            if requireBracket:
-                self.match(_mapper.Separators(")").name)
-            return kid
+    # Statement parser for each token kind a statement can start with.
+    statements = {
+        **dict.fromkeys(_mapper.TYPE_KINDS, decl),
+        _kinds.KEYWORD_IF: ifStatement,
+        _kinds.KEYWORD_WHILE: whileStatement,
+        _kinds.KEYWORD_RETURN: returnStatement,
+        _kinds.SEP_BRACE_LEFT: block,
+        _kinds.IDENTIFIER: nameStatement,
+    }
 
-        t.addKid(kid)
-        t.addKid(self.simpleExpr())
+    # FIRST set of statement: the token kinds a statement can start with.
+    statementFirst = frozenset(statements)
 
+    def expr(self, requireBracket=False):
         if requireBracket:
-            self.match(_mapper.Separators(")").name)
+            self.match(_kinds.SEP_PAREN_LEFT)
+        t = self.binaryExpr()
+        if requireBracket:
+            self.match(_kinds.SEP_PAREN_RIGHT)
         return t
 
-    def simpleExpr(self):
-        kid = self.term()
-        t = self.formAddOpTree()
-        while t is not None:
-            t.addKid(kid)
-            t.addKid(self.term())
-            kid = t
-            t = self.formAddOpTree()
-        return kid
-
-    def term(self):
-        kid = self.factor()
-        t = self.formMultOpTree()
-        while t is not None:
-            t.addKid(kid)
-            t.addKid(self.factor())
-            kid = t
-            t = self.formMultOpTree()
-        return kid
+    # Precedence climbing with explicit stacks, so neither precedence levels nor parentheses recurse.
+    # Relational operators do not associate, a second one in the same parentheses ends the expression.
+    def binaryExpr(self):
+        trees, leaves = self.trees, self.leaves
+        operands = []
+        operators = []  # Pairs of operator tree and precedence, None for an open parenthesis.
+        relational = [False]  # Whether each level of parentheses already has a relational operator.
+        while True:
+            while self.curToken.kind == _kinds.SEP_PAREN_LEFT:
+                self.nextToken()
+                operators.append(None)
+                relational.append(False)
+            # Plain names and literals are the common operands, build them without a call.
+            token = self.curToken
+            if token.kind == _kinds.IDENTIFIER and self.peekToken.kind != _kinds.SEP_PAREN_LEFT:
+                operands.append(trees.idTree(token.value, token.key()))
+                self.declare()
+                self.nextToken()
+            elif token.kind == _kinds.NUMBER:
+                operands.append(leaves.numberTree(token.value))
+                self.nextToken()
+            else:
+                operands.append(self.factor())
 
-    def factor(self):
-        if self.checkToken(_mapper.Separators("(").name):
-            self.nextToken()
-            t = self.expr()
-            self.match(_mapper.Separators(")").name)
-            return t
+            while True:
+                kind = self.curToken.kind
+                op = self.binaryOPTrees.get(kind)
+                if op is not None and not (relational[-1] and kind in Parser.relOPs):
+                    tree, precedence = op
+                    if operators and operators[-1] is not None and operators[-1][1] >= precedence:
+                        self.reduce(operands, operators, precedence)
+                    if kind in Parser.relOPs:
+                        relational[-1] = True
+                    operators.append((tree(self.curToken.token_name), precedence))
+                    self.nextToken()
+                    break
+                if operators:
+                    self.reduce(operands, operators, 0)
+                if len(relational) == 1:
+                    return operands[0]
+                self.match(_kinds.SEP_PAREN_RIGHT)
+                operators.pop()
+                relational.pop()
+
+    # Builds the trees of the stacked operators binding at least as tight as the precedence, down to the innermost
+    # open parenthesis.
+    @staticmethod
+    def reduce(operands, operators, precedence):
+        while operators and operators[-1] is not None and operators[-1][1] >= precedence:
+            t = operators.pop()[0]
+            right = operands.pop()
+            operands.append(t.addKid(operands.pop()).addKid(right))
 
-        if self.checkToken(_mapper.NUMBER):
-            t = numberTree(self.curToken.value)
+    # An operand of binaryExpr, parentheses are handled there.
+    def factor(self):
+        if self.checkToken(_kinds.NUMBER):
+            t = self.leaves.numberTree(self.curToken.value)
             self.nextToken()
             return t
 
-        if self.checkToken(_mapper.STRING):
-            t = stringTree(self.curToken.value)
+        if self.checkToken(_kinds.STRING):
+            t = self.leaves.stringTree(self.curToken.value)
             self.nextToken()
             return t
 
         t = self.name()
-        if not self.checkToken(_mapper.Separators("(").name):
+        if not self.checkToken(_kinds.SEP_PAREN_LEFT):
             return t
 
         self.nextToken()
-        t = callTree().addKid(t)
-        if not self.checkToken(_mapper.Separators(")").name):
+        t = self.trees.callTree().addKid(t)
+        if not self.checkToken(_kinds.SEP_PAREN_RIGHT):
             while True:
                 t.addKid(self.expr())
-                if self.checkToken(_mapper.Separators(",").name):
+                if self.checkToken(_kinds.SEP_COMMA):
                     self.nextToken()
                 else:
                     break
-        self.match(_mapper.Separators(")").name)
+        self.match(_kinds.SEP_PAREN_RIGHT)
         return t
-
-    def formRelationTree(self):
-        if self.curToken.token_name in Parser.relOPs:
-            t = relOPTree(self.curToken.token_name)
-            self.nextToken()
-            return t
-        else:
-            return None
-
-    def formAddOpTree(self):
-        if self.curToken.token_name in Parser.addOPs:
-            t = addOPTree(self.curToken.token_name)
-            self.nextToken()
-            return t
-        else:
-            return None
-
-    def formMultOpTree(self):
-        if self.curToken.token_name in Parser.multOPs:
-            t = multOPTree(self.curToken.token_name)
-            self.nextToken()
-            return t
-        else:
-            return None
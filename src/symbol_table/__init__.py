@@ -3,16 +3,26 @@
 This module would generate a symbol table from a collection of tokens.
 
 Example:
-    >>> from lex import Lexer
+    >>> from lex import Lexer, TokenStream
     >>> from symbol_table import SymbolTable
     >>>
     >>> lexer = Lexer(character_stream)
-    >>> st = SymbolTable(lexer=lexer)
+    >>> st = SymbolTable(lexer=TokenStream(lexer))
+
+A parser can populate the table instead, as it parses the same tokens:
+
+    >>> token_stream = TokenStream(lexer)
+    >>> st = SymbolTable(line_index=token_stream.line_index)
+    >>> program_tree, errors = Parser(token_stream, symbolTable=st).parse()
 """
 
-__all__ = ["SymbolTable"]
+__all__ = ["SymbolEntries", "SymbolTable"]
 
-from collections import UserDict as _UserDict
+import json as _json
+from array import array as _array
+from collections.abc import Mapping as _Mapping
+from typing import Iterator as _Iterator
+from typing import Sequence as _Sequence
 from typing import Tuple as _Tuple
 from typing import Union as _Union
 
@@ -20,141 +30,423 @@ try:
     from lex import Lexer as _Lexer
     from lex import LexerError as _LexerError
     from lex import Token as _Token
+    from lex import TokenStore as _TokenStore
+    from lex import TokenStream as _TokenStream
     import mapper as _mapper
+    from mapper import kinds as _kinds
     import mapper.code_mapper as _code_mapper
 except ImportError:
     from src.lex import Lexer as _Lexer
     from src.lex import LexerError as _LexerError
     from src.lex import Token as _Token
+    from src.lex import TokenStore as _TokenStore
+    from src.lex import TokenStream as _TokenStream
     import src.mapper as _mapper
+    from src.mapper import kinds as _kinds
     import src.mapper.code_mapper as _code_mapper
 
 
-class SymbolTable(_UserDict):
-    """The symbol table."""
+def _scope_name(scope_level: int) -> str:
+    """Returns the name of a scope level."""
+    if scope_level == -1:
+        return "outer_scope"
+    if scope_level == 0:
+        return "class_scope"
+    return f"inner_scope_{scope_level}"
+
+
+class SymbolEntries(_Mapping):
+    """The entries of a symbol table, in parallel arrays with one row per identifier.
+
+    Names, types and attribute tuples are interned: each distinct one is stored once, and the rows hold its index.
+    As a mapping, the entries are a read-only view of the symbol table data: each key maps to a dict built from its
+    row, with the same keys and values as a dict entry.
+
+    Attributes:
+        identifier_keys (array): The key of each row.
+        identifier_positions (array): The key of the declaration of each row.
+        identifier_names (array): The index of the name of each row in `strings`.
+        identifier_types (array): The index of the type of each row in `strings`, -1 for no type.
+        identifier_attributes (array): The index of the attributes of each row in `attribute_tuples`.
+        scope_levels (array): The scope level of each row.
+        scope_labels (array): The scope label of each row.
+        strings (List[str]): The distinct names and types.
+        attribute_tuples (List[Tuple[str, ...]]): The distinct attribute tuples.
+    """
+
+    def __init__(self):
+        """SymbolEntries constructor."""
+        self.identifier_keys = _array("q")
+        self.identifier_positions = _array("q")
+        self.identifier_names = _array("i")
+        self.identifier_types = _array("i")
+        self.identifier_attributes = _array("i")
+        self.scope_levels = _array("i")
+        self.scope_labels = _array("i")
+        self.strings = []
+        self.attribute_tuples = []
+        self.__string_indexes = {}
+        self.__attribute_indexes = {}
+        self.__rows = {}
+
+    def __getstate__(self):
+        # The indexes are rebuilt from the arrays, so pickles only hold arrays and distinct strings.
+        state = self.__dict__.copy()
+        for name in ("_SymbolEntries__string_indexes", "_SymbolEntries__attribute_indexes", "_SymbolEntries__rows"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__string_indexes = {string: index for index, string in enumerate(self.strings)}
+        self.__attribute_indexes = {attributes: index for index, attributes in enumerate(self.attribute_tuples)}
+        self.__rows = {key: row for row, key in enumerate(self.identifier_keys)}
+
+    @classmethod
+    def from_dict(cls, data) -> "SymbolEntries":
+        """Creates the entries of symbol table data in dicts, such as the `data` of an older symbol table.
+
+        Args:
+            data (Mapping[int, dict]): The entries.
+
+        Returns:
+            SymbolEntries: The entries.
+        """
+        entries = cls()
+        for key, value in data.items():
+            entries.append(key, value["identifier_position"], value["identifier_name"], value["identifier_type"],
+                           tuple(value["identifier_attribute"]), value["identifier_scope"][1], value["scope_label"])
+        return entries
+
+    def _intern(self, string: str) -> int:
+        index = self.__string_indexes.get(string)
+        if index is None:
+            index = self.__string_indexes[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+    def append(self, identifier_key: int, identifier_position: int, identifier_name: str, identifier_type: str,
+               identifier_attribute: _Tuple[str, ...], scope_level: int, scope_label: int):
+        """Appends the row of an identifier.
+
+        Args:
+            identifier_key (int): The key of the identifier.
+            identifier_position (int): The key of its declaration.
+            identifier_name (str): Its name.
+            identifier_type (str): Its type, None if it has none.
+            identifier_attribute (Tuple[str, ...]): Its attributes.
+            scope_level (int): Its scope level.
+            scope_label (int): Its scope label.
+
+        Raises:
+            ValueError: If the key already has a row.
+        """
+        if identifier_key in self.__rows:
+            raise ValueError(f"Key {identifier_key} already has a row")
+        self.__rows[identifier_key] = len(self.identifier_keys)
+        attribute_index = self.__attribute_indexes.get(identifier_attribute)
+        if attribute_index is None:
+            attribute_index = self.__attribute_indexes[identifier_attribute] = len(self.attribute_tuples)
+            self.attribute_tuples.append(identifier_attribute)
+        self.identifier_keys.append(identifier_key)
+        self.identifier_positions.append(identifier_position)
+        self.identifier_names.append(self._intern(identifier_name))
+        self.identifier_types.append(-1 if identifier_type is None else self._intern(identifier_type))
+        self.identifier_attributes.append(attribute_index)
+        self.scope_levels.append(scope_level)
+        self.scope_labels.append(scope_label)
+
+    def row(self, identifier_key: int) -> int:
+        """Returns the row of a key.
+
+        Args:
+            identifier_key (int): The key of the identifier.
+
+        Returns:
+            int: The index of the row.
+
+        Raises:
+            KeyError: If there is no identifier with the key.
+        """
+        return self.__rows[identifier_key]
+
+    def name(self, row: int) -> str:
+        """Returns the name of a row."""
+        return self.strings[self.identifier_names[row]]
+
+    def type(self, row: int) -> _Union[str, None]:
+        """Returns the type of a row, None if it has none."""
+        index = self.identifier_types[row]
+        return None if index < 0 else self.strings[index]
+
+    def entry(self, row: int) -> dict:
+        """Returns the entry of a row, in a dict.
+
+        Args:
+            row (int): The index of the row.
+
+        Returns:
+            dict: The entry, as in the symbol table data.
+        """
+        scope_level = self.scope_levels[row]
+        return {
+            "identifier_position": self.identifier_positions[row],
+            "identifier_name": self.name(row),
+            "identifier_type": self.type(row),
+            "identifier_attribute": self.attribute_tuples[self.identifier_attributes[row]],
+            "identifier_scope": (_scope_name(scope_level), scope_level),
+            "scope_label": self.scope_labels[row],
+        }
+
+    def iter_json(self, indent: int = 4) -> _Iterator[str]:
+        """Encodes the entries as one JSON object, an entry at a time.
+
+        The chunks join into the same text as `json.dump` of the data in dicts, without building it whole.
+
+        Args:
+            indent (int): The indent of the nested objects and arrays, None for a single line.
+
+        Yields:
+            str: The next chunk of the text.
+        """
+        if not self.identifier_keys:
+            yield "{}"
+            return
+        encoder = _json.JSONEncoder(indent=indent)
+        newline = "" if indent is None else "\n" + " " * indent
+        separator = "{" + newline
+        for row, identifier_key in enumerate(self.identifier_keys):
+            entry = encoder.encode(self.entry(row))
+            if newline:
+                entry = entry.replace("\n", newline)
+            yield f'{separator}"{identifier_key}": {entry}'
+            separator = ("," if newline else ", ") + newline
+        yield "}" if indent is None else "\n}"
+
+    def iter_json_lines(self) -> _Iterator[str]:
+        """Encodes the entries as JSON Lines: one compact object per line, with the key of its identifier first.
+
+        Yields:
+            str: The line of each entry, with its newline.
+        """
+        encoder = _json.JSONEncoder(separators=(",", ":"))
+        for row, identifier_key in enumerate(self.identifier_keys):
+            yield encoder.encode({"identifier_key": identifier_key, **self.entry(row)}) + "\n"
+
+    def __getitem__(self, identifier_key: int) -> dict:
+        return self.entry(self.row(identifier_key))
+
+    def __iter__(self):
+        return iter(self.identifier_keys)
+
+    def __len__(self) -> int:
+        return len(self.identifier_keys)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class SymbolTable(_Mapping):
+    """The symbol table.
+
+    As a mapping, it maps the key of each identifier to its entry, in a dict built on access.
+
+    Attributes:
+        line_index (LineIndex): The line index of the character stream, to report the positions of identifier keys.
+    """
 
-    def __init__(self, lexer: _Lexer):
+    def __init__(self, lexer: _Union[_Lexer, _TokenStream, _TokenStore] = None, line_index=None):
         """SymbolTable constructor.
 
         Takes lexer or tokens argument to get the collection of tokens. Prioritizes parser if both are provided.
+        Without one, the table starts empty, for a `Parser` to populate while it parses.
 
         Args:
-            lexer: The lexer for generating collections of token.
+            lexer: The lexer for generating collections of token, or a token stream or token store that has already
+                been lexed, which is walked by index. Optional.
+            line_index (LineIndex): The line index of the character stream, for an empty table. Optional.
         """
-        super().__init__()
-        self.__tokens = lexer.tokens()
+        self.__entries = SymbolEntries()
+        self.__scope_level = -1
+        self.__scope_label = 0
+        self.__identifier_type = None
+        self.__identifier_attribute = []
+        # For each name, the key of its first typed entry at each scope level it has one, and the same for entries
+        # with a scope label of at most 2. Keys grow with the position, so the first entry matching an identifier
+        # is the smallest key found at the levels it can see.
+        self.__declared = {}
+        self.__early_declared = {}
+        if lexer is None:
+            self.line_index = line_index
+            return
+        self.__tokens = lexer if isinstance(lexer, _Sequence) else _TokenStream(lexer)
+        self.line_index = self.__tokens.line_index
+        self.__token_count = len(self.__tokens)
+        self.__index = -1  # The index of the next token.
         self.__current_token = None
         self.__next_token = None
         self._advance()
         self._advance()
         self._generate()
 
+    @classmethod
+    def from_data(cls, data, line_index) -> "SymbolTable":
+        """Creates a symbol table holding already generated data, without walking the tokens again.
+
+        Args:
+            data (SymbolEntries | Mapping[int, dict]): The data of a generated symbol table.
+            line_index (LineIndex): The line index of the character stream the data was generated from.
+
+        Returns:
+            SymbolTable: The symbol table.
+        """
+        table = cls(line_index=line_index)
+        table.__entries = data if isinstance(data, SymbolEntries) else SymbolEntries.from_dict(data)
+        return table
+
+    @property
+    def data(self) -> SymbolEntries:
+        """SymbolEntries: The entries, a read-only mapping of each identifier key to its entry in a dict."""
+        return self.__entries
+
+    def __getitem__(self, identifier_key: int) -> dict:
+        return self.__entries[identifier_key]
+
+    def __iter__(self):
+        return iter(self.__entries)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
     def _advance(self):
         """Advances the token collection."""
         self.__current_token = self.__next_token
-        self.__next_token = next(self.__tokens, None)
+        self.__index += 1
+        self.__next_token = self.__tokens[self.__index] if self.__index < self.__token_count else None
 
     def _generate(self):
         """Function for generating a symbol table."""
-        scope_level = -1
-        scope_label = 0
-        identifier_type = None
-        identifier_attribute = []
-
         while self.__current_token is not None:
-            if self.__current_token.check_token(_mapper.IDENTIFIER):
-                identifier_key = identifier_position = self.__current_token.key()
+            if self.__current_token.check_token(_kinds.IDENTIFIER):
+                identifier_token = self.__current_token
                 identifier_name = self.__current_token.value
-                if self.__next_token.check_token(_mapper.Separators("[")):
+                if self.__next_token.check_token(_kinds.SEP_BRACKET_LEFT):
                     while True:
                         self._advance()
                         identifier_name += self.__current_token.value
-                        if (self.__current_token.check_token(_mapper.Separators("]"))
-                                and not self.__next_token.check_token(_mapper.Separators("["))):
+                        if (self.__current_token.check_token(_kinds.SEP_BRACKET_RIGHT)
+                                and not self.__next_token.check_token(_kinds.SEP_BRACKET_LEFT)):
                             break
+                self.add_identifier(identifier_token, identifier_name)
 
-                if scope_level == -1:
-                    scope = "outer_scope"
-                elif scope_level == 0:
-                    scope = "class_scope"
-                elif scope_level >= 1:
-                    scope = f"inner_scope_{scope_level}"
-                else:
-                    raise _LexerError(self.__current_token.position, "Out of scope!")
-
-                if identifier_type is None:
-                    # try:
-                    #     # A valid key must fulfill all the criteria below:
-                    #     #   has the same identifier name,
-                    #     #   its identifier type cannot be NoneType,
-                    #     #   has the same or larger scope as the current identifier,
-                    #     #   is the most recent key.
-                    for key, value in reversed(self.data.items()):
-                        if (value["identifier_name"] == identifier_name
-                                and value["identifier_type"] is not None
-                                and value["identifier_scope"][1] <= scope_level):
-                            if value["identifier_scope"][1] == scope_level and abs(value["scope_label"] - 1) > 1:
-                                continue
-                            identifier_position = key
-                    if identifier_name in _code_mapper.Double_Java or identifier_name == "scanner.nextDouble":
-                        identifier_type = "double"
-                    elif identifier_name in _code_mapper.Float_Java:
-                        identifier_type = "float"
-                    elif identifier_name in _code_mapper.Long_Java:
-                        identifier_type = "long"
-                    elif identifier_name in _code_mapper.Int_Java:
-                        identifier_type = "int"
-                    elif identifier_name in _code_mapper.Short_Java:
-                        identifier_type = "short"
-                    elif identifier_name in _code_mapper.Byte_Java:
-                        identifier_type = "byte"
-                    elif identifier_name in _code_mapper.String_Java:
-                        identifier_type = "String"
-
-                self[identifier_key] = {
-                    "identifier_position": identifier_position,
-                    "identifier_name": identifier_name,
-                    "identifier_type": identifier_type,
-                    "identifier_attribute": tuple(identifier_attribute),
-                    "identifier_scope": (scope, scope_level),
-                    "scope_label": scope_label,
-                }
-                identifier_type = None
-                identifier_attribute.clear()
-
-            elif self.__current_token.check_token(_mapper.KeywordsType.names()):
+            elif self.__current_token.kind in _mapper.TYPE_KINDS:
                 position = self.__current_token.position
                 identifier_type = self.__current_token.value
-                while self.__next_token.check_token(_mapper.KeywordsType.names()):
+                while self.__next_token.kind in _mapper.TYPE_KINDS:
                     self._advance()
                     identifier_type += " " + self.__current_token.value
-                if self.__next_token.check_token(_mapper.Separators("[")):
+                if self.__next_token.check_token(_kinds.SEP_BRACKET_LEFT):
                     while True:
                         self._advance()
                         identifier_type += self.__current_token.value
-                        if (self.__current_token.check_token(_mapper.Separators("]"))
-                                and not self.__next_token.check_token(_mapper.Separators("["))):
+                        if (self.__current_token.check_token(_kinds.SEP_BRACKET_RIGHT)
+                                and not self.__next_token.check_token(_kinds.SEP_BRACKET_LEFT)):
                             break
-                if not self.__next_token.check_token(_mapper.IDENTIFIER):
+                if not self.__next_token.check_token(_kinds.IDENTIFIER):
                     raise SyntaxError(
                         f"Invalid data type `{identifier_type + ' ' + self.__next_token.value}` at line {position}")
+                self.declare_type(identifier_type)
 
-            elif self.__current_token.check_token(_mapper.KeywordsAttribute.names()):
-                if (self.__next_token.check_token(_mapper.KeywordsAttribute.names())
-                        or self.__next_token.check_token(_mapper.KeywordsType.names())):
-                    identifier_attribute.append(self.__current_token.value)
+            elif self.__current_token.kind in _mapper.ATTRIBUTE_KINDS:
+                if (self.__next_token.kind in _mapper.ATTRIBUTE_KINDS
+                        or self.__next_token.kind in _mapper.TYPE_KINDS):
+                    self.__identifier_attribute.append(self.__current_token.value)
 
-            elif (self.__current_token.check_token(_mapper.Separators("{"))
-                  or self.__current_token.check_token(_mapper.Separators("("))):
-                scope_level += 1
-                scope_label += 1
+            elif (self.__current_token.check_token(_kinds.SEP_BRACE_LEFT)
+                  or self.__current_token.check_token(_kinds.SEP_PAREN_LEFT)):
+                self.open_scope()
 
-            elif (self.__current_token.check_token(_mapper.Separators("}"))
-                  or self.__current_token.check_token(_mapper.Separators(")"))):
-                scope_level -= 1
+            elif (self.__current_token.check_token(_kinds.SEP_BRACE_RIGHT)
+                  or self.__current_token.check_token(_kinds.SEP_PAREN_RIGHT)):
+                self.close_scope()
 
             self._advance()
 
+    def open_scope(self):
+        """Opens a scope, at a `{` or a `(`."""
+        self.__scope_level += 1
+        self.__scope_label += 1
+
+    def close_scope(self):
+        """Closes the innermost scope, at a `}` or a `)`."""
+        self.__scope_level -= 1
+
+    def declare_type(self, identifier_type: str):
+        """Sets the type of the next identifier added, which is then a declaration.
+
+        Args:
+            identifier_type (str): The type, with a `[]` for each dimension of an array.
+        """
+        self.__identifier_type = identifier_type
+
+    def add_identifier(self, token: _Token, identifier_name: str = None):
+        """Adds the entry of an identifier, in the innermost scope.
+
+        An identifier without a declared type is resolved to the position of its declaration.
+
+        Args:
+            token (Token): The identifier token.
+            identifier_name (str): The name of the identifier. Optional, the value of the token by default.
+
+        Raises:
+            LexerError: If the identifier is outside of the outer scope.
+        """
+        identifier_key = identifier_position = token.key()
+        if identifier_name is None:
+            identifier_name = token.value
+        scope_level = self.__scope_level
+        scope_label = self.__scope_label
+        identifier_type = self.__identifier_type
+
+        if scope_level < -1:
+            raise _LexerError(token.position, "Out of scope!")
+
+        if identifier_type is None:
+            # A valid key must fulfill all the criteria below:
+            #   has the same identifier name,
+            #   its identifier type cannot be NoneType,
+            #   has a larger scope than the current identifier,
+            #   or the same scope with a scope label of at most 2,
+            #   is the first such key.
+            keys = [key for level, key in self.__declared.get(identifier_name, {}).items() if level < scope_level]
+            if scope_level in self.__early_declared.get(identifier_name, {}):
+                keys.append(self.__early_declared[identifier_name][scope_level])
+            if keys:
+                identifier_position = min(keys)
+            if identifier_name in _code_mapper.Double_Java or identifier_name == "scanner.nextDouble":
+                identifier_type = "double"
+            elif identifier_name in _code_mapper.Float_Java:
+                identifier_type = "float"
+            elif identifier_name in _code_mapper.Long_Java:
+                identifier_type = "long"
+            elif identifier_name in _code_mapper.Int_Java:
+                identifier_type = "int"
+            elif identifier_name in _code_mapper.Short_Java:
+                identifier_type = "short"
+            elif identifier_name in _code_mapper.Byte_Java:
+                identifier_type = "byte"
+            elif identifier_name in _code_mapper.String_Java:
+                identifier_type = "String"
+
+        self.__entries.append(identifier_key, identifier_position, identifier_name, identifier_type,
+                              tuple(self.__identifier_attribute), scope_level, scope_label)
+        if identifier_type is not None:
+            self.__declared.setdefault(identifier_name, {}).setdefault(scope_level, identifier_key)
+            if scope_label <= 2:
+                self.__early_declared.setdefault(identifier_name, {}).setdefault(scope_level, identifier_key)
+        self.__identifier_type = None
+        self.__identifier_attribute.clear()
+
     def get_declaration_data(self, key):
         """Returns the declaration type of the identifier with the given key.
 
@@ -179,8 +471,9 @@ class SymbolTable(_UserDict):
         Returns:
             Returns positive if scope A > scope B, 0 if equal, and negative if scope A < scope B.
         """
-        a_scope = self.get(key_a)["scope_label"]
-        b_scope = self.get(key_b)["scope_label"]
+        entries = self.__entries
+        a_scope = entries.scope_labels[entries.row(key_a)]
+        b_scope = entries.scope_labels[entries.row(key_b)]
         return (b_scope - a_scope) == 0
 
     def get_identifier_position(self, identifier_key) -> int:
@@ -192,7 +485,8 @@ class SymbolTable(_UserDict):
         Returns:
             The value of identifier_position attribute of the identifier.
         """
-        return self.get(identifier_key)["identifier_position"]
+        entries = self.__entries
+        return entries.identifier_positions[entries.row(identifier_key)]
 
     def get_identifier_name(self, identifier_key) -> str:
         """Gets the name of the given identifier key.
@@ -203,7 +497,7 @@ class SymbolTable(_UserDict):
         Returns:
             The value of identifier_name attribute of the identifier.
         """
-        return self.get(identifier_key)["identifier_name"]
+        return self.__entries.name(self.__entries.row(identifier_key))
 
     def get_identifier_type(self, identifier_key) -> _Union[str, None]:
         """Gets the type of the given identifier key.
@@ -215,7 +509,7 @@ class SymbolTable(_UserDict):
             The tuple value of identifier_type attribute of the identifier.
 
         """
-        return self.get(identifier_key)["identifier_type"]
+        return self.__entries.type(self.__entries.row(identifier_key))
 
     def get_identifier_attribute(self, identifier_key) -> _Tuple[str, ...]:
         """Gets the attributes of the given identifier key.
@@ -226,7 +520,8 @@ class SymbolTable(_UserDict):
         Returns:
             The value of identifier_attribute attribute of the identifier.
         """
-        return self.get(identifier_key)["identifier_attribute"]
+        entries = self.__entries
+        return entries.attribute_tuples[entries.identifier_attributes[entries.row(identifier_key)]]
 
     def get_identifier_scope(self, identifier_key) -> _Tuple[str, int]:
         """Gets the scope of the given identifier key.
@@ -244,4 +539,5 @@ class SymbolTable(_UserDict):
             >>> scope
             ("class_scope", 0)
         """
-        return self.get(identifier_key)["identifier_scope"]
+        scope_level = self.__entries.scope_levels[self.__entries.row(identifier_key)]
+        return _scope_name(scope_level), scope_level
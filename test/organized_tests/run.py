@@ -1,5 +1,8 @@
 import subprocess
 import os
+import random
+import sys
+import tempfile
 
 
 def path_from_file(path):
@@ -35,8 +38,75 @@ def run_single_test(test_path, cc=True):
         subprocess.run(['python', path_from_file('../../src/jcosim.py'), f'-i{path_from_file(test_path)}'])
 
 
+def run_batch(cats=[]):
+    # every file of the categories in one batch run, one line per diagnostic
+    print()
+    print(cats)
+    subprocess.run(['python', path_from_file('../../src/jcosim.py'), '-b', *(f'-i{path_from_file(cat)}' for cat in cats)])
+
+
+def run_cached_test(test_path):
+    # the first run stores the frontend results in an empty cache, the second one loads them
+    print()
+    print(test_path)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, JCOSIM_CACHE_DIR=cache_dir)
+        args = ['python', path_from_file('../../src/jcosim.py'), f'-i{path_from_file(test_path)}', '-g']
+        outputs = [subprocess.run(args + ['--no-cache'], capture_output=True, text=True).stdout]
+        outputs += [subprocess.run(args, capture_output=True, text=True, env=env).stdout for _ in range(2)]
+        entries = len(os.listdir(cache_dir))
+    print('OK' if entries == 1 and outputs[0] == outputs[1] == outputs[2] else 'FAILED')
+
+
+def run_relex_test(cats=[], edits=200):
+    # random edits one after another, the edited token stream must be the one of a full lex of the edited source
+    sys.path.append(path_from_file('../../src'))
+    from lex import Lexer, LexerError, TokenStream
+
+    def tokens(stream):
+        return [[(t.position, t.token_name, t.value) for t in ts] for ts in (stream.tokens(ignore=False), stream)]
+
+    pieces = [' ', '\n', 'x', '1', '.', '=', '+', ';', '(', ')', '{', '}', '"', '/*', '*/', '//', 'int ', 'class ']
+
+    def run_single_relex_test(test_path):
+        rand = random.Random(test_path)
+        with open(test_path, 'r') as f:
+            source = f.read()
+        stream = TokenStream(Lexer(source))
+        for _ in range(edits):
+            offset = rand.randint(0, len(source))
+            removed_length = rand.randint(0, min(3, len(source) - offset))
+            inserted_text = ''.join(rand.choice(pieces) for _ in range(rand.randint(0, 2)))
+            edited = source[:offset] + inserted_text + source[offset + removed_length:]
+            try:
+                expected = TokenStream(Lexer(edited))
+            except LexerError as e:
+                expected = str(e)
+            try:
+                got = stream.edit(offset, removed_length, inserted_text)
+            except LexerError as e:
+                got = str(e)
+            if isinstance(expected, str) or isinstance(got, str):
+                if expected != got:
+                    return False
+                continue
+            if tokens(expected) != tokens(got):
+                return False
+            source, stream = edited, got
+        return True
+
+    for cat in cats:
+        for sd in sub_dirs(path_from_file(cat)):
+            print()
+            print(f'{sd}/Main.java')
+            print('OK' if run_single_relex_test(f'{sd}/Main.java') else 'FAILED')
+
+
 if __name__ == "__main__":
     e1 = 'syntax-error'
     e2 = 'semantic-error'
     w = 'work'
     run_test([e1, e2, w])
+    run_batch([e1, e2, w])
+    run_cached_test(f'{w}/case1/Main.java')
+    run_relex_test([e1, e2, w])
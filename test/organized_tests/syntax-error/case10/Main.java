@@ -0,0 +1,22 @@
+package case10;
+import java.util.Scanner;
+
+public class Main {
+    static double circleArea(double r) {
+        return Math.PI * Math.pow(r, 2) // missing ; here
+    }
+
+    public static void main(String[] args) {
+        var scanner = new Scanner(System.in);
+        var r = scanner.nextDouble();
+        int a = ;  // missing expression here
+        int b;
+        if (r <= 0) {
+            System.out.println("Circle radius must be positive");
+        } else {
+            var res = circleArea(r);
+            System.out.printf("Circle area: %.2f", res);
+        }
+        scanner.close() // missing ; here
+    }
+}
\ No newline at end of file